@@ -1,14 +1,45 @@
-from OpenGL.GL import *
-from OpenGL.GLUT import *
-from OpenGL.GLU import *
+import atexit
+import contextlib
+import ctypes
+import hashlib
+import json
 import math
-import random
+import multiprocessing
+import os
+import queue
+import sys
+import threading
 import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Headless mode runs the simulation without a window and without importing
+# OpenGL at all (set POKEMON_HEADLESS=1 or pass --headless; replays always
+# run headless)
+HEADLESS = (os.environ.get("POKEMON_HEADLESS") == "1" or "--headless" in sys.argv
+            or any(arg.startswith("--replay") for arg in sys.argv))
+
+if not HEADLESS:
+    from OpenGL.GL import *
+    from OpenGL.GLUT import *
+    from OpenGL.GLU import *
+    from OpenGL.GL import shaders
+else:
+    # freeglut values of the constants the input listeners compare against,
+    # so recorded input can be replayed without GLUT
+    GLUT_LEFT_BUTTON, GLUT_RIGHT_BUTTON = 0, 2
+    GLUT_DOWN, GLUT_UP = 0, 1
+    GLUT_KEY_LEFT, GLUT_KEY_UP, GLUT_KEY_RIGHT, GLUT_KEY_DOWN = 100, 101, 102, 103
+    GLUT_LEFT, GLUT_NOT_VISIBLE = 0, 0
 
 # Camera-related variables
 camera_pos = [0, 500, 500]
 fovY = 60
-GRID_LENGTH = 600
+CAMERA_NEAR = 0.1
+CAMERA_FAR = 1500
+GRID_LENGTH = 40000  # Half-size of the world (a multiple of CHUNK_SIZE)
 
 # Game state variables
 GAME_RUNNING = True
@@ -21,13 +52,15 @@ player_rotation = 0.0
 player_pitch = 0.0  # Vertical look angle
 player_health = 100
 player_max_health = 100
-player_speed = 5.0
+player_speed = 150.0  # Walking speed in units per second
 player_radius = 100.0  # Player detection radius - increased for larger detection area
 is_first_person = False
 
-# Jump physics
+# Jump physics (units per second, matches the old per-frame feel at 60 fps)
 player_vel_z = 0.0
 is_grounded = True
+JUMP_VELOCITY = 1080.0
+GRAVITY = 2400.0
 
 # Game mechanics
 pokeball_count = 10
@@ -39,7 +72,16 @@ current_pokeball_type = 0  # 0=pokeball, 1=greatball, 2=ultraball, 3=masterball
 # Walking animation variables
 is_walking = False
 walk_cycle = 0.0
-walk_speed = 0.2
+walk_speed = 6.0  # Walk-cycle radians per second
+
+# Held keys, tracked from key down/up events and read once per tick
+keys_held = set()
+MOVEMENT_KEYS = {  # Key -> (forward, left) direction it adds
+    b'w': (1, 0),
+    b's': (-1, 0),
+    b'a': (0, 1),
+    b'd': (0, -1),
+}
 
 # Mouse tracking variables
 mouse_x = WINDOW_WIDTH // 2
@@ -47,39 +89,1129 @@ mouse_y = WINDOW_HEIGHT // 2
 mouse_sensitivity = 0.2
 mouse_capture_enabled = True  # Toggle for mouse control
 
-# Pokemon data - using simple lists instead of classes
-# Each pokemon: [x, y, z, type, health, max_health, caught, being_caught, direction, move_timer]
-pokemon_list = []
+class HandleTable:
+    """Generational handles for entities kept in a dense, reorderable array.
+    
+    A handle packs a slot number (low INDEX_BITS) with the slot's generation.
+    Each slot records the entity's current row, so lookups stay O(1) however
+    the rows are shuffled. Releasing a slot bumps its generation, so stale
+    handles resolve to -1 instead of to whatever reuses the slot.
+    """
+    INDEX_BITS = 24
+    INDEX_MASK = (1 << INDEX_BITS) - 1
+    
+    def __init__(self):
+        self.rows = []  # slot -> row in the dense array, -1 when free
+        self.generations = []  # slot -> current generation
+        self.free = []  # Released slots, reused last-in first-out
+    
+    def __len__(self):
+        return len(self.rows) - len(self.free)
+    
+    def allocate(self, row):
+        """Return a new handle pointing at row"""
+        if self.free:
+            slot = self.free.pop()
+            self.rows[slot] = row
+        else:
+            slot = len(self.rows)
+            self.rows.append(row)
+            self.generations.append(0)
+        return (self.generations[slot] << self.INDEX_BITS) | slot
+    
+    def row_of(self, handle):
+        """Row a handle points at, or -1 if it was released or never existed"""
+        if handle < 0:
+            return -1
+        slot = handle & self.INDEX_MASK
+        if slot >= len(self.rows) or self.generations[slot] != handle >> self.INDEX_BITS:
+            return -1
+        return self.rows[slot]
+    
+    def move(self, handle, row):
+        self.rows[handle & self.INDEX_MASK] = row
+    
+    def release(self, handle):
+        slot = handle & self.INDEX_MASK
+        self.rows[slot] = -1
+        self.generations[slot] += 1
+        self.free.append(slot)
+    
+    def clear(self):
+        # Generations are kept so handles from before the clear stay stale
+        for slot, row in enumerate(self.rows):
+            if row >= 0:
+                self.rows[slot] = -1
+                self.generations[slot] += 1
+                self.free.append(slot)
+
+class PokemonStore:
+    """Pokemon kept as parallel NumPy columns so updates can run as array ops.
+    
+    Rows [0, count) are in use; remove() swaps the last row into the hole, so
+    row numbers are only valid until the next removal. Hold on to the handle
+    column (see HandleTable) to refer to a pokemon across removals. bush is
+    the handle of the pokemon's bush. prev_x/prev_y/prev_z hold the position
+    from the previous tick for render interpolation. After share_columns()
+    the SHARED_FIELDS columns live in shared memory for PokemonAIPool.
+    """
+    FIELDS = (
+        ("x", np.float64), ("y", np.float64), ("z", np.float64),
+        ("ptype", np.int64), ("health", np.int64), ("max_health", np.int64),
+        ("caught", np.bool_), ("being_caught", np.bool_),
+        ("direction", np.float64), ("move_timer", np.float64),
+        ("prev_x", np.float64), ("prev_y", np.float64), ("prev_z", np.float64),
+        ("lod", np.int8), ("handle", np.int64), ("bush", np.int64),
+    )
+    SHARED_FIELDS = ("x", "y", "ptype", "caught", "move_timer")  # What pokemon_ai_rows() touches
+    
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.capacity = capacity
+        self.handles = HandleTable()
+        self.shared = None  # Field -> SharedMemory block while the columns are shared
+        for name, dtype in self.FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+    
+    def __len__(self):
+        return self.count
+    
+    def _grow(self):
+        """Double the capacity of every column"""
+        self.capacity *= 2
+        for name, dtype in self.FIELDS:
+            self._replace_column(name, dtype, self.shared is not None and name in self.SHARED_FIELDS)
+    
+    def _replace_column(self, name, dtype, shared):
+        """Reallocate a column at the current capacity, in shared memory or not, keeping its rows"""
+        if shared:
+            block = shared_memory.SharedMemory(create=True, size=self.capacity * np.dtype(dtype).itemsize)
+            column = np.ndarray(self.capacity, dtype=dtype, buffer=block.buf)
+        else:
+            column = np.zeros(self.capacity, dtype=dtype)
+        column[:self.count] = getattr(self, name)[:self.count]
+        setattr(self, name, column)
+        
+        old = self.shared.pop(name, None) if self.shared is not None else None
+        if shared:
+            self.shared[name] = block
+        if old is not None:
+            release_shared(old)
+    
+    def share_columns(self):
+        """Move the SHARED_FIELDS columns into shared memory"""
+        if self.shared is None:
+            self.shared = {}
+            dtypes = dict(self.FIELDS)
+            for name in self.SHARED_FIELDS:
+                self._replace_column(name, dtypes[name], True)
+    
+    def unshare_columns(self):
+        """Copy the shared columns back into private arrays and free the shared memory"""
+        if self.shared is not None:
+            dtypes = dict(self.FIELDS)
+            for name in self.SHARED_FIELDS:
+                self._replace_column(name, dtypes[name], False)
+            self.shared = None
+    
+    def add(self, x, y, z, ptype, health, direction):
+        """Append a new wild pokemon and return its index"""
+        if self.count == self.capacity:
+            self._grow()
+        i = self.count
+        self.x[i] = self.prev_x[i] = x
+        self.y[i] = self.prev_y[i] = y
+        self.z[i] = self.prev_z[i] = z
+        self.ptype[i] = ptype
+        self.health[i] = health
+        self.max_health[i] = health
+        self.caught[i] = False
+        self.being_caught[i] = False
+        self.direction[i] = direction
+        self.move_timer[i] = 0.0
+        self.lod[i] = LOD_UNSET
+        self.handle[i] = self.handles.allocate(i)
+        self.bush[i] = NO_HANDLE
+        self.count += 1
+        return i
+    
+    def remove(self, index):
+        """Remove one pokemon in O(1) by moving the last row into its place"""
+        self.handles.release(int(self.handle[index]))
+        last = self.count - 1
+        if index != last:
+            for name, _ in self.FIELDS:
+                column = getattr(self, name)
+                column[index] = column[last]
+            self.handles.move(int(self.handle[index]), index)
+        self.count = last
+    
+    def row_of(self, handle):
+        """Current row of a pokemon handle, or -1 if it is gone"""
+        return self.handles.row_of(handle)
+    
+    def clear(self):
+        self.count = 0
+        self.handles.clear()
+    
+    def snapshot(self):
+        """Copy current positions into prev_* before a tick"""
+        n = self.count
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+        self.prev_z[:n] = self.z[:n]
+
+class PokemonAIPool:
+    """Runs pokemon_ai_rows() over slices of a PokemonStore in worker processes.
+    
+    The columns the AI reads and writes (plus a per-row noise buffer) live
+    in shared memory, so a tick sends the workers only block names and row
+    ranges; they update their rows in place and send back the rows that
+    moved. Every random number is drawn by the caller into the noise
+    buffer first, so the result does not depend on the worker count.
+    """
+    def __init__(self, store, workers):
+        self.store = store
+        self.workers = workers
+        self.noise_block = None
+        self.noise = None
+        # Shared memory first: the workers then inherit our resource tracker
+        # instead of starting their own, which would unlink blocks on exit
+        store.share_columns()
+        self.pool = multiprocessing.Pool(workers)
+    
+    def noise_rows(self, n):
+        """Shared (n, 3) buffer for the tick's jitter roll and x/y offsets"""
+        capacity = self.store.capacity
+        if self.noise is None or len(self.noise) != capacity:
+            self.noise = None
+            if self.noise_block is not None:
+                release_shared(self.noise_block)
+            self.noise_block = shared_memory.SharedMemory(create=True, size=capacity * 3 * 8)
+            self.noise = np.ndarray((capacity, 3), dtype=np.float64, buffer=self.noise_block.buf)
+        return self.noise[:n]
+    
+    def run(self, n, dt, low, high):
+        """Run the AI over rows [0, n) split across the workers; return the rows that moved"""
+        names = {name: block.name for name, block in self.store.shared.items()}
+        names["noise"] = self.noise_block.name
+        bounds = np.linspace(0, n, self.workers + 1).astype(np.int64).tolist()
+        tasks = [(names, self.store.capacity, start, stop, dt, low, high)
+                 for start, stop in zip(bounds, bounds[1:]) if stop > start]
+        return np.concatenate(self.pool.map(pokemon_ai_task, tasks))
+    
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+        self.noise = None
+        if self.noise_block is not None:
+            release_shared(self.noise_block)
+            self.noise_block = None
+        self.store.unshare_columns()
+
+class SpatialHash:
+    """Uniform 2D grid mapping items to the cells their x/y position falls in.
+    
+    Positions are updated incrementally with move(); query() returns the
+    items in every cell touched by a circle, as broadphase candidates.
+    """
+    def __init__(self, cell_size):
+        self.cell_size = float(cell_size)
+        self.cells = {}  # (cx, cy) -> set of items
+        self.item_cells = {}  # item -> (cx, cy)
+    
+    def __len__(self):
+        return len(self.item_cells)
+    
+    def __contains__(self, item):
+        return item in self.item_cells
+    
+    def cell_of(self, x, y):
+        return (int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size)))
+    
+    def insert(self, item, x, y):
+        key = self.cell_of(x, y)
+        self.item_cells[item] = key
+        self.cells.setdefault(key, set()).add(item)
+    
+    def remove(self, item):
+        key = self.item_cells.pop(item, None)
+        if key is None:
+            return
+        cell = self.cells[key]
+        cell.discard(item)
+        if not cell:
+            del self.cells[key]
+    
+    def move(self, item, x, y):
+        """Update an item's position; only touches the grid if it changed cell"""
+        key = self.cell_of(x, y)
+        old_key = self.item_cells.get(item)
+        if key == old_key:
+            return
+        if old_key is not None:
+            self.remove(item)
+        self.item_cells[item] = key
+        self.cells.setdefault(key, set()).add(item)
+    
+    def clear(self):
+        self.cells.clear()
+        self.item_cells.clear()
+    
+    def query(self, x, y, radius):
+        """Items in every cell overlapping the circle (x, y, radius)"""
+        size = self.cell_size
+        x0 = int(math.floor((x - radius) / size))
+        x1 = int(math.floor((x + radius) / size))
+        y0 = int(math.floor((y - radius) / size))
+        y1 = int(math.floor((y + radius) / size))
+        found = []
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    found.extend(cell)
+        return found
+
+class PoissonDiskGrid:
+    """Background occupancy grid for Poisson-disk sampling over a rectangle.
+    
+    Cells are min_distance / sqrt(2) wide, so each holds at most one sample
+    and any point closer than min_distance to a candidate lies in the 5x5
+    block of cells around it: a spacing check is a fixed-size lookup instead
+    of a scan over every point. Points added that share a cell with another
+    (pre-existing pokemon already too close together) go to an overflow list
+    that is checked directly.
+    """
+    def __init__(self, min_distance, x0, y0, x1, y1):
+        self.min_distance = float(min_distance)
+        self.cell_size = self.min_distance / math.sqrt(2)
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+        # Two cells of padding so every in-bounds neighbourhood is in the array
+        width = int(math.ceil((x1 - x0) / self.cell_size)) + 5
+        height = int(math.ceil((y1 - y0) / self.cell_size)) + 5
+        self.cells = np.full((width, height), -1, dtype=np.int64)  # Point index per cell
+        # At most one point per cell; the spare last entry absorbs the -1 lookups
+        self.x = np.zeros(width * height + 1)
+        self.y = np.zeros(width * height + 1)
+        self.count = 0
+        self.overflow_x = []
+        self.overflow_y = []
+    
+    def cell_of(self, x, y):
+        return (int((x - self.x0) // self.cell_size) + 2, int((y - self.y0) // self.cell_size) + 2)
+    
+    def add(self, x, y):
+        """Record a point (within min_distance of the rectangle)"""
+        cx, cy = self.cell_of(x, y)
+        cx = min(max(cx, 0), self.cells.shape[0] - 1)
+        cy = min(max(cy, 0), self.cells.shape[1] - 1)
+        if self.cells[cx, cy] >= 0:
+            self.overflow_x.append(x)
+            self.overflow_y.append(y)
+            return
+        self.cells[cx, cy] = self.count
+        self.x[self.count] = x
+        self.y[self.count] = y
+        self.count += 1
+    
+    def fits(self, xs, ys):
+        """Boolean array: which candidates are in the rectangle and min_distance from every point"""
+        inside = (xs >= self.x0) & (xs <= self.x1) & (ys >= self.y0) & (ys <= self.y1)
+        cx = ((np.clip(xs, self.x0, self.x1) - self.x0) // self.cell_size).astype(np.int64) + 2
+        cy = ((np.clip(ys, self.y0, self.y1) - self.y0) // self.cell_size).astype(np.int64) + 2
+        neighbours = self.cells[cx[:, None] + NEIGHBOUR_DX, cy[:, None] + NEIGHBOUR_DY]
+        dx = self.x[neighbours] - xs[:, None]
+        dy = self.y[neighbours] - ys[:, None]
+        limit = self.min_distance * self.min_distance
+        close = (neighbours >= 0) & (dx * dx + dy * dy < limit)
+        ok = inside & ~close.any(axis=1)
+        if self.overflow_x:
+            dx = np.array(self.overflow_x) - xs[:, None]
+            dy = np.array(self.overflow_y) - ys[:, None]
+            ok &= ~(dx * dx + dy * dy < limit).any(axis=1)
+        return ok
+
+# Offsets of the 5x5 cell block PoissonDiskGrid.fits() looks up
+NEIGHBOUR_DX, NEIGHBOUR_DY = (offsets.ravel() for offsets in np.mgrid[-2:3, -2:3])
+
+class ProjectilePool:
+    """Fixed-capacity projectile storage that reuses its slots.
+    
+    Every slot is a preallocated list [x, y, z, vx, vy, vz, active, target_x,
+    target_y, target_z]. Slots [0, count) are in flight and the rest form the
+    free list, so a throw never allocates and pop() swaps the last active
+    slot into the hole in O(1). high_water records the most ever in flight.
+    """
+    SLOT_SIZE = 10
+    
+    def __init__(self, capacity):
+        self.slots = [[0.0] * self.SLOT_SIZE for _ in range(capacity)]
+        self.capacity = capacity
+        self.count = 0
+        self.high_water = 0
+    
+    def __len__(self):
+        return self.count
+    
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError("projectile index out of range")
+        return self.slots[index]
+    
+    def __iter__(self):
+        slots = self.slots
+        for i in range(self.count):
+            yield slots[i]
+    
+    def spawn(self, x, y, z, vx, vy, vz, target_x=0.0, target_y=0.0, target_z=0.0):
+        """Fill a free slot and return it, or None when the pool is full"""
+        if self.count == self.capacity:
+            return None
+        slot = self.slots[self.count]
+        slot[0], slot[1], slot[2] = x, y, z
+        slot[3], slot[4], slot[5] = vx, vy, vz
+        slot[6] = True
+        slot[7], slot[8], slot[9] = target_x, target_y, target_z
+        self.count += 1
+        if self.count > self.high_water:
+            self.high_water = self.count
+        return slot
+    
+    def pop(self, index):
+        """Retire a projectile by swapping the last active slot into its place.
+        
+        Iterating from the end backwards stays valid while popping.
+        """
+        last = self.count - 1
+        slots = self.slots
+        slots[index], slots[last] = slots[last], slots[index]
+        slots[last][6] = False
+        self.count = last
+    
+    def clear(self):
+        for i in range(self.count):
+            self.slots[i][6] = False
+        self.count = 0
+
+class InstancedSpheres:
+    """One shared sphere mesh drawn many times per frame in a single call.
+    
+    Each instance is a row (x, y, z, radius, r, g, b). Rows are queued while
+    walking the scene and flush() draws them all with glDrawArraysInstanced,
+    lit in the shader the same way the fixed-function pipeline lights GLUT
+    spheres. Without shader support it falls back to one glCallList per row.
+    """
+    ROW_SIZE = 7
+    
+    def __init__(self, slices, stacks):
+        self.slices = slices
+        self.stacks = stacks
+        self.rows = []  # Single queued instances
+        self.blocks = []  # Arrays of queued instances, ROW_SIZE columns each
+        self.vertex_count = 0
+        self.vertex_buffer = None
+        self.instance_buffer = None
+        self.display_list = None  # Fallback mesh when instancing is unavailable
+    
+    def queue(self, x, y, z, radius, r, g, b):
+        self.rows.append((x, y, z, radius, r, g, b))
+    
+    def queue_block(self, instances):
+        if len(instances):
+            self.blocks.append(instances)
+    
+    def build(self):
+        vertices = sphere_triangles(self.slices, self.stacks)
+        self.vertex_count = len(vertices)
+        if get_instance_program():
+            self.vertex_buffer, self.instance_buffer = glGenBuffers(2)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vertex_buffer)
+            glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            return
+        # Positions on a unit sphere double as normals
+        self.display_list = glGenLists(1)
+        glNewList(self.display_list, GL_COMPILE)
+        glBegin(GL_TRIANGLES)
+        for vx, vy, vz in vertices:
+            glNormal3f(vx, vy, vz)
+            glVertex3f(vx, vy, vz)
+        glEnd()
+        glEndList()
+    
+    def flush(self):
+        """Draw every queued instance and empty the queue"""
+        blocks = self.blocks
+        if self.rows:
+            blocks.append(np.array(self.rows, dtype=np.float32))
+        if not blocks:
+            return
+        instances = np.ascontiguousarray(np.concatenate(blocks), dtype=np.float32)
+        self.rows = []
+        self.blocks = []
+        
+        if self.vertex_count == 0:
+            self.build()
+        if self.display_list is not None:
+            self.draw_each(instances)
+            return
+        
+        stride = self.ROW_SIZE * 4
+        glUseProgram(get_instance_program())
+        glBindBuffer(GL_ARRAY_BUFFER, self.vertex_buffer)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 0, None)
+        
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_buffer)
+        glBufferData(GL_ARRAY_BUFFER, instances.nbytes, instances, GL_STREAM_DRAW)
+        glEnableVertexAttribArray(1)  # Center and radius
+        glVertexAttribPointer(1, 4, GL_FLOAT, GL_FALSE, stride, None)
+        glVertexAttribDivisor(1, 1)
+        glEnableVertexAttribArray(2)  # Color
+        glVertexAttribPointer(2, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(16))
+        glVertexAttribDivisor(2, 1)
+        
+        glDrawArraysInstanced(GL_TRIANGLES, 0, self.vertex_count, len(instances))
+        
+        glVertexAttribDivisor(1, 0)
+        glVertexAttribDivisor(2, 0)
+        for attribute in (0, 1, 2):
+            glDisableVertexAttribArray(attribute)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glUseProgram(0)
+    
+    def draw_each(self, instances):
+        glPushAttrib(GL_ENABLE_BIT | GL_CURRENT_BIT)
+        glEnable(GL_NORMALIZE)  # Keep normals unit length under glScalef
+        for x, y, z, radius, r, g, b in instances:
+            glPushMatrix()
+            glTranslatef(x, y, z)
+            glScalef(radius, radius, radius)
+            glColor3f(r, g, b)
+            glCallList(self.display_list)
+            glPopMatrix()
+        glPopAttrib()
+
+class ImpostorBatch:
+    """Camera-facing textured quads standing in for distant spheres.
+    
+    Rows are the same (x, y, z, radius, r, g, b) as InstancedSpheres. The
+    quad texture is a baked, lit sphere (see build_impostor_texture), tinted
+    by each row's color and cut out with the alpha test, so no sorting is needed.
+    """
+    def __init__(self):
+        self.blocks = []
+    
+    def queue_block(self, instances):
+        if len(instances):
+            self.blocks.append(instances)
+    
+    def flush(self):
+        """Draw every queued impostor facing the camera and empty the queue"""
+        global impostor_texture
+        if not self.blocks:
+            return
+        instances = np.concatenate(self.blocks)
+        self.blocks = []
+        if impostor_texture is None:
+            impostor_texture = build_impostor_texture()
+        
+        # Quad corners spanned by the camera's right and up axes
+        corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]], dtype=np.float32)
+        offsets = corners[:, 0:1] * camera.right + corners[:, 1:2] * camera.up  # (4, 3)
+        n = len(instances)
+        positions = (instances[:, None, 0:3] + instances[:, None, 3:4] * offsets).astype(np.float32)
+        texcoords = np.tile((corners + 1.0) * 0.5, (n, 1))
+        colors = np.repeat(np.ascontiguousarray(instances[:, 4:7], dtype=np.float32), 4, axis=0)
+        
+        glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT | GL_TEXTURE_BIT)
+        glDisable(GL_LIGHTING)  # Shading is baked into the texture
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, impostor_texture)
+        glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_MODULATE)
+        glEnable(GL_ALPHA_TEST)
+        glAlphaFunc(GL_GREATER, 0.5)
+        
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, positions.reshape(-1, 3))
+        glTexCoordPointer(2, GL_FLOAT, 0, texcoords)
+        glColorPointer(3, GL_FLOAT, 0, colors)
+        glDrawArrays(GL_QUADS, 0, n * 4)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glPopAttrib()
+
+class SphereLods:
+    """Instanced sphere meshes at decreasing tessellation plus an impostor level.
+    
+    Level k < len(tessellations) draws with the k-th mesh; the last level,
+    len(tessellations), draws a flat impostor. See select_lods().
+    """
+    def __init__(self, tessellations):
+        self.meshes = [InstancedSpheres(n, n) for n in tessellations]
+        self.impostors = ImpostorBatch()
+        self.impostor_level = len(self.meshes)
+    
+    def batch(self, level):
+        if level >= self.impostor_level:
+            return self.impostors
+        return self.meshes[level]
+    
+    def queue(self, level, x, y, z, radius, r, g, b):
+        if level >= self.impostor_level:
+            self.impostors.queue_block(np.array([[x, y, z, radius, r, g, b]], dtype=np.float32))
+        else:
+            self.meshes[level].queue(x, y, z, radius, r, g, b)
+    
+    def queue_block(self, instances, levels):
+        for level in range(self.impostor_level + 1):
+            self.batch(level).queue_block(instances[levels == level])
+    
+    def flush(self):
+        for mesh in self.meshes:
+            mesh.flush()
+        self.impostors.flush()
+
+# Pokemon data - one row per pokemon in a PokemonStore
+# Columns: x, y, z, ptype, health, max_health, caught, being_caught, direction, move_timer
+pokemon_store = PokemonStore()
+pokemon_grid = SpatialHash(64)  # Broadphase of uncaught pokemon by handle
+pokemon_ai = None  # PokemonAIPool when --ai-workers is set (and there is more than one CPU)
+game_seed = None  # Seed game_rng was created from (see seed_game)
+game_rng = np.random.default_rng()  # The one random stream every game system draws from
+sim_tick = 0  # Ticks simulated so far; input recordings are stamped with it
+input_recorder = None  # InputRecorder while --record is active
+replaying = False  # True while replay_inputs() feeds recorded input, which must not touch files
+RECORDING_VERSION = 4  # Bumped when the meaning of recorded input changes
 max_pokemon = 20
 spawn_timer = 0
 spawn_interval = 3.0
+SPAWN_MIN_DISTANCE = 80  # Minimum spacing between uncaught pokemon
+SPAWN_ATTEMPTS = 30  # Candidate positions tried per spawn (and per active point when filling)
+SPAWN_BATCH = 64  # Darts thrown, or active points expanded, together by poisson_disk_points()
 last_time = 0
+time_scale = 1.0  # Multiplier applied to every simulation step
 
-# Pokeball data - using simple lists instead of classes
+# Fixed-timestep simulation
+sim_tick_hz = 60.0  # Simulation ticks per second (independent of frame rate)
+max_catchup_steps = 5  # Most ticks run in one frame before dropping time
+sim_accumulator = 0.0  # Unsimulated time carried over to the next frame
+render_alpha = 1.0  # Blend factor between the last two ticks for drawing
+previous_positions = {}  # id(entity) -> (entity, x, y, z) from the previous tick
+
+# Pokeball data - pooled slots, see ProjectilePool
 # Each pokeball: [x, y, z, vx, vy, vz, active, target_x, target_y, target_z]
-pokeballs_thrown = []
-rocks_thrown = []
+PROJECTILE_POOL_SIZE = 256  # Most projectiles of one kind in flight at once
+pokeballs_thrown = ProjectilePool(PROJECTILE_POOL_SIZE)
+rocks_thrown = ProjectilePool(PROJECTILE_POOL_SIZE)
 
-# Bush data - each bush: [x, y, z, radius, pokemon_index]
+# Bush data - each bush: [x, y, z, radius, pokemon_handle, lod, handle]
+# Removal swaps the last bush into the hole; bush_handles tracks where each one is
+NO_HANDLE = -1
 bush_list = []
+bush_handles = HandleTable()
+
+class VisibilitySet:
+    """Handles of the bushes within the player's detection radius ("revealed").
+    
+    A revealed bush is hidden and its pokemon is shown. A full pass measures
+    every bush from an anchor point. A bush more than slack from the edge of
+    the radius can't change sides until the player strays slack from that
+    anchor, so in between only the boundary band is re-tested, with squared
+    distances. Moving farther, or changing the radius, triggers a new full pass.
+    """
+    def __init__(self, slack):
+        self.slack = slack
+        self.revealed = set()
+        self.boundary = set()  # Bushes within slack of the edge at the anchor
+        self.anchor = None  # (x, y, radius) of the last full pass
+        self.position = None  # (x, y) of the last update
+    
+    def clear(self):
+        self.revealed.clear()
+        self.boundary.clear()
+        self.anchor = None
+        self.position = None
+    
+    def update(self, x, y, radius):
+        """Bring the set up to date for the player at (x, y) with the given radius"""
+        anchor = self.anchor
+        if anchor is None or radius != anchor[2] or \
+                (x - anchor[0])**2 + (y - anchor[1])**2 > self.slack * self.slack:
+            self.rebuild(x, y, radius)
+            return
+        if (x, y) == self.position:
+            return
+        self.position = (x, y)
+        for handle in self.boundary:
+            self.test(handle, get_bush(handle))
+    
+    def test(self, handle, bush):
+        x, y = self.position
+        reach = self.anchor[2] + bush[3]
+        if (x - bush[0])**2 + (y - bush[1])**2 <= reach * reach:
+            self.revealed.add(handle)
+        else:
+            self.revealed.discard(handle)
+    
+    def rebuild(self, x, y, radius):
+        self.anchor = (x, y, radius)
+        self.position = (x, y)
+        self.revealed.clear()
+        self.boundary.clear()
+        if not bush_list:
+            return
+        bushes = np.array([(bush[0], bush[1], bush[3], bush[6]) for bush in bush_list])
+        handles = bushes[:, 3].astype(np.int64)
+        gap = np.hypot(bushes[:, 0] - x, bushes[:, 1] - y) - (radius + bushes[:, 2])
+        self.revealed.update(handles[gap <= 0].tolist())
+        self.boundary.update(handles[np.abs(gap) <= self.slack].tolist())
+    
+    def added(self, handle, bush):
+        if self.anchor is None:
+            return  # The next update does a full pass
+        ax, ay, radius = self.anchor
+        gap = math.hypot(bush[0] - ax, bush[1] - ay) - (radius + bush[3])
+        if abs(gap) <= self.slack:
+            self.boundary.add(handle)
+        self.test(handle, bush)
+    
+    def removed(self, handle):
+        self.revealed.discard(handle)
+        self.boundary.discard(handle)
+
+VISIBILITY_SLACK = 50.0  # Player movement allowed before the visibility set needs a full pass
+bush_visibility = VisibilitySet(VISIBILITY_SLACK)
+
+class ChunkMap:
+    """Square chunks of the world streamed in and out around a moving center.
+    
+    Chunks within active_radius chunks of the center's chunk (Chebyshev
+    distance) are active. An active chunk is only frozen once it is more
+    than keep_radius away, so pacing along a chunk border does not thrash.
+    Frozen chunks keep their contents as bytes, least recently frozen
+    first; past frozen_limit the oldest are forgotten and come back empty.
+    """
+    def __init__(self, chunk_size, active_radius, keep_radius, frozen_limit):
+        self.chunk_size = chunk_size
+        self.active_radius = active_radius
+        self.keep_radius = keep_radius
+        self.frozen_limit = frozen_limit
+        self.active = set()
+        self.frozen = {}  # (cx, cy) -> bytes, in freezing order
+        self.center = None
+    
+    def key_of(self, x, y):
+        return (int(math.floor(x / self.chunk_size)), int(math.floor(y / self.chunk_size)))
+    
+    def keys_around(self, key, radius):
+        """Every chunk within radius of key, nearest rings first"""
+        cx, cy = key
+        keys = [(cx + dx, cy + dy) for dx in range(-radius, radius + 1) for dy in range(-radius, radius + 1)]
+        keys.sort(key=lambda k: max(abs(k[0] - cx), abs(k[1] - cy)))
+        return keys
+    
+    def keys_in(self, x0, y0, x1, y1):
+        """Every chunk overlapping the rectangle"""
+        first = self.key_of(x0, y0)
+        last = self.key_of(x1, y1)
+        return [(cx, cy) for cx in range(first[0], last[0] + 1) for cy in range(first[1], last[1] + 1)]
+    
+    def bounds(self, key):
+        """(x0, y0, x1, y1) of a chunk"""
+        size = self.chunk_size
+        return key[0] * size, key[1] * size, (key[0] + 1) * size, (key[1] + 1) * size
+    
+    def recenter(self, x, y):
+        """Move the center to (x, y); return (chunks to freeze, chunks to activate)"""
+        key = self.key_of(x, y)
+        if key == self.center:
+            return [], []
+        self.center = key
+        keep = set(self.keys_around(key, self.keep_radius))
+        leaving = sorted(k for k in self.active if k not in keep)
+        entering = [k for k in self.keys_around(key, self.active_radius) if k not in self.active]
+        self.active.difference_update(leaving)
+        self.active.update(entering)
+        return leaving, entering
+    
+    def freeze(self, key, data):
+        self.frozen.pop(key, None)
+        self.frozen[key] = data
+        while len(self.frozen) > self.frozen_limit:
+            del self.frozen[next(iter(self.frozen))]
+    
+    def thaw(self, key):
+        """Take a chunk's frozen bytes (None if it has none)"""
+        return self.frozen.pop(key, None)
+    
+    def clear(self):
+        self.active.clear()
+        self.frozen.clear()
+        self.center = None
+
+# Chunked world - only chunks near the player are simulated; the rest are frozen
+CHUNK_SIZE = 800  # World units per chunk side (a multiple of BLOCK_SIZE)
+ACTIVE_CHUNK_RADIUS = 1  # Chunks activated around the player's
+KEEP_CHUNK_RADIUS = 2  # Active chunks are frozen once farther than this
+FROZEN_CHUNK_LIMIT = 4096  # Frozen chunks remembered before the oldest are dropped
+world_chunks = ChunkMap(CHUNK_SIZE, ACTIVE_CHUNK_RADIUS, KEEP_CHUNK_RADIUS, FROZEN_CHUNK_LIMIT)
+# What a frozen chunk keeps of each uncaught pokemon and its bush (bush_radius 0: none)
+CHUNK_RECORD = np.dtype([
+    ("x", np.float64), ("y", np.float64), ("z", np.float64),
+    ("ptype", np.int64), ("health", np.int64), ("max_health", np.int64),
+    ("direction", np.float64), ("move_timer", np.float64),
+    ("bush_x", np.float64), ("bush_y", np.float64), ("bush_z", np.float64), ("bush_radius", np.float64),
+])
 
 # UI event message (e.g., hit/capture notifications)
 last_event_message = ""
 last_event_timer = 0.0  # seconds remaining to display
 
+class HudModel:
+    """Retained HUD state, kept current by game events instead of per-frame scans.
+    
+    Spawns, captures and faints update the wild counts; anything else that
+    changes a HUD value calls mark_dirty(). The formatted strings (as text
+    vertices) are rebuilt only while dirty.
+    """
+    def __init__(self):
+        self.wild_count = 0
+        self.type_counts = {}  # species name -> wild count
+        self.type_order = None  # Species names as the type list shows them, None until re-sorted
+        self.nearest_distance = None  # To the nearest wild pokemon within range
+        self.nearest_from = None  # Player x, y the nearest distance was measured from
+        self.opponent = None  # (health, trainer count) shown for the nearest trainer, None without any
+        self.dirty = True
+        self.text = []  # Cached text vertex arrays for every HUD string
+    
+    def mark_dirty(self):
+        self.dirty = True
+    
+    def pokemon_added(self, ptype):
+        name = pokemon_types[ptype][0]
+        self.type_counts[name] = self.type_counts.get(name, 0) + 1
+        self.wild_count += 1
+        self.type_order = None
+        self.nearest_from = None
+        self.dirty = True
+    
+    def pokemon_removed(self, ptype):
+        name = pokemon_types[ptype][0]
+        count = self.type_counts.get(name, 0) - 1
+        if count > 0:
+            self.type_counts[name] = count
+        else:
+            self.type_counts.pop(name, None)
+        self.wild_count -= 1
+        self.type_order = None
+        self.nearest_from = None
+        self.dirty = True
+    
+    def types_in_order(self):
+        """Species names in order of their first wild pokemon in the store, as the type list shows them"""
+        if self.type_order is None:
+            n = pokemon_store.count
+            wild = pokemon_store.ptype[:n][~pokemon_store.caught[:n]]
+            ptypes, first = np.unique(wild, return_index=True)
+            names = (pokemon_types[ptype][0] for ptype in ptypes[np.argsort(first)].tolist())
+            self.type_order = list(dict.fromkeys(names))
+        return self.type_order
+    
+    def reset(self):
+        self.wild_count = 0
+        self.type_counts.clear()
+        self.type_order = None
+        self.nearest_distance = None
+        self.nearest_from = None
+        self.dirty = True
+
+hud = HudModel()
+HUD_NEAREST_STEP = 5.0  # Player movement that triggers a new nearest-pokemon lookup
+
+class ProfileScope:
+    """Times one `with` block into the frame it was opened in"""
+    __slots__ = ("profiler", "name", "events", "start", "depth")
+    
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+    
+    def __enter__(self):
+        profiler = self.profiler
+        self.events = profiler.current
+        self.depth = profiler.depth
+        profiler.depth += 1
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        self.profiler.depth -= 1
+        self.events.append((self.name, self.start, end - self.start, self.depth))
+        return False
+
+class FrameProfiler:
+    """Scoped CPU timers for every update and draw stage of the last few frames.
+    
+    Wrap a stage in `with profiler.scope("name"):`. While disabled, scope()
+    hands back a shared no-op context, so instrumented code costs one call.
+    Each frame is a list of (name, start, seconds, depth) events; the last
+    `capacity` frames are kept in a ring buffer for the overlay and for
+    Chrome trace export.
+    """
+    NULL_SCOPE = contextlib.nullcontext()
+    
+    def __init__(self, capacity):
+        self.enabled = False
+        self.frames = deque(maxlen=capacity)  # (start, seconds, events) per finished frame
+        self.current = None  # Events of the frame being recorded
+        self.frame_start = 0.0
+        self.depth = 0
+    
+    def scope(self, name):
+        if self.current is None:
+            return self.NULL_SCOPE
+        return ProfileScope(self, name)
+    
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            self.current = None
+            self.depth = 0
+    
+    def begin_frame(self):
+        """Start recording a frame, unless one is already open"""
+        if self.enabled and self.current is None:
+            self.current = []
+            self.depth = 0
+            self.frame_start = time.perf_counter()
+    
+    def end_frame(self):
+        if self.current is None:
+            return
+        self.frames.append((self.frame_start, time.perf_counter() - self.frame_start, self.current))
+        self.current = None
+    
+    def stats(self):
+        """Frame and per-stage (average, p99) milliseconds, stages slowest first"""
+        if not self.frames:
+            return (0.0, 0.0), []
+        frame_ms = np.array([seconds for _, seconds, _ in self.frames]) * 1e3
+        per_stage = {}
+        for index, (_, _, events) in enumerate(self.frames):
+            for name, _, seconds, _ in events:
+                totals = per_stage.setdefault(name, np.zeros(len(self.frames)))
+                totals[index] += seconds * 1e3  # Stages that ran several times add up
+        stages = [(name, float(ms.mean()), float(np.percentile(ms, 99))) for name, ms in per_stage.items()]
+        stages.sort(key=lambda stage: stage[1], reverse=True)
+        return (float(frame_ms.mean()), float(np.percentile(frame_ms, 99))), stages
+    
+    def export_chrome_trace(self, path):
+        """Write the buffered frames as Chrome trace-event JSON (chrome://tracing, Perfetto)"""
+        if not self.frames:
+            return 0
+        origin = self.frames[0][0]
+        events = []
+        for number, (start, seconds, frame_events) in enumerate(self.frames):
+            events.append({"name": "frame", "ph": "X", "pid": 1, "tid": 1, "args": {"frame": number},
+                           "ts": (start - origin) * 1e6, "dur": seconds * 1e6})
+            for name, event_start, event_seconds, _ in frame_events:
+                events.append({"name": name, "ph": "X", "pid": 1, "tid": 1,
+                               "ts": (event_start - origin) * 1e6, "dur": event_seconds * 1e6})
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+        return len(self.frames)
+
+PROFILER_FRAMES = 240  # Frames kept for the overlay and trace export
+PROFILER_REFRESH_FRAMES = 15  # Frames between overlay statistics refreshes
+PROFILER_STAGE_LINES = 8  # Slowest stages listed on the overlay
+PROFILER_GRAPH_HEIGHT = 60  # Overlay graph pixels for PROFILER_GRAPH_MS
+PROFILER_GRAPH_MS = 33.3
+PROFILER_COLORS = [(0.9, 0.3, 0.3), (0.3, 0.8, 0.3), (0.3, 0.5, 1.0), (1.0, 0.8, 0.2),
+                   (0.8, 0.4, 1.0), (0.2, 0.9, 0.9), (1.0, 0.5, 0.1), (0.7, 0.7, 0.7)]
+profiler = FrameProfiler(PROFILER_FRAMES)
+profiler_overlay = False  # Toggled with P; recording runs only while it is shown
+profiler_stats = None  # Cached profiler.stats() for the overlay
+profiler_stats_age = 0
+profiler_stage_colors = {}  # Stage name -> graph color, assigned on first sight
+trace_path = "frame_trace.json"  # Written by the O key
+
+class EventLog:
+    """Game-event log that never blocks the frame.
+    
+    log() stamps a record with the simulation tick and its level and queues
+    it; a background thread writes queued records in batches to a file or
+    to stdout. When the bounded queue is full the record is dropped and
+    counted instead of waited on, and the writer reports the drops once it
+    catches up. The thread starts on the first record.
+    """
+    DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+    LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+    
+    def __init__(self, capacity, batch):
+        self.queue = queue.Queue(capacity)
+        self.batch = batch
+        self.level = self.INFO
+        self.stream = None  # None writes to whatever sys.stdout is at the time
+        self.owns_stream = False
+        self.dropped = 0  # Records lost to a full queue
+        self.reported = 0  # Drops already written to the log
+        self.thread = None
+    
+    def open(self, path):
+        """Write to a file (appending) instead of stdout"""
+        self.flush()
+        if self.owns_stream:
+            self.stream.close()
+        self.stream = open(path, "a")
+        self.owns_stream = True
+    
+    def log(self, level, message):
+        if level < self.level:
+            return
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._write_batches, name="event-log", daemon=True)
+            self.thread.start()
+        try:
+            self.queue.put_nowait((sim_tick, level, message))
+        except queue.Full:
+            self.dropped += 1
+    
+    def debug(self, message):
+        self.log(self.DEBUG, message)
+    
+    def info(self, message):
+        self.log(self.INFO, message)
+    
+    def warning(self, message):
+        self.log(self.WARNING, message)
+    
+    def error(self, message):
+        self.log(self.ERROR, message)
+    
+    def flush(self):
+        """Wait until every queued record has been written"""
+        if self.thread is not None:
+            self.queue.join()
+    
+    def close(self):
+        """Write what is queued and stop the writer thread"""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.owns_stream:
+            self.stream.close()
+            self.stream = None
+            self.owns_stream = False
+    
+    def _write_batches(self):
+        names = {value: name.upper() for name, value in self.LEVELS.items()}
+        while True:
+            records = [self.queue.get()]  # Sleep until there is work
+            while len(records) < self.batch:
+                try:
+                    records.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [f"[{tick:>7}] {names[level]:<7} {message}\n" for tick, level, message in filter(None, records)]
+            dropped = self.dropped - self.reported
+            if dropped:
+                self.reported += dropped
+                lines.append(f"[{sim_tick:>7}] WARNING {dropped} events dropped, log queue full\n")
+            if lines:
+                stream = self.stream or sys.stdout
+                try:
+                    stream.write("".join(lines))
+                    stream.flush()
+                except (OSError, ValueError):  # Closed pipe or file: keep draining so nothing blocks
+                    pass
+            for _ in records:
+                self.queue.task_done()
+            if None in records:
+                return
+
+EVENT_LOG_CAPACITY = 4096  # Queued records before new ones are dropped
+EVENT_LOG_BATCH = 256  # Records written per write() call at most
+event_log = EventLog(EVENT_LOG_CAPACITY, EVENT_LOG_BATCH)
+atexit.register(event_log.close)
+
 # Game state
 game_over = False
 ultra_balls = 0
 
-# AI Opponent system
-opponent_pos = [200, 200, 30]
-opponent_health = 100
+class OpponentStore:
+    """AI trainers kept as parallel NumPy columns so one pass updates them all.
+    
+    Rows [0, count) are the trainers of the current match. direction is
+    where a trainer faces and walks; prev_x/prev_y/prev_z hold the position
+    from the previous tick for render interpolation.
+    """
+    FIELDS = (
+        ("x", np.float64), ("y", np.float64), ("z", np.float64),
+        ("prev_x", np.float64), ("prev_y", np.float64), ("prev_z", np.float64),
+        ("health", np.int64), ("pokeballs", np.int64), ("throw_cooldown", np.float64),
+        ("move_timer", np.float64), ("direction", np.float64),
+    )
+    
+    def __init__(self):
+        self.count = 0
+        for name, dtype in self.FIELDS:
+            setattr(self, name, np.zeros(0, dtype=dtype))
+    
+    def __len__(self):
+        return self.count
+    
+    def spawn(self, count):
+        """Replace the trainers with count fresh ones on a ring around the origin"""
+        self.count = count
+        for name, dtype in self.FIELDS:
+            setattr(self, name, np.zeros(count, dtype=dtype))
+        # The first one stands at (200, 200); a crowd gets a ring wide enough to spread out
+        radius = max(200.0 * math.sqrt(2.0), count * OPPONENT_SPACING / (2.0 * math.pi))
+        angle = np.radians(45.0 + 360.0 * np.arange(count) / max(count, 1))
+        self.x[:] = self.prev_x[:] = np.round(radius * np.cos(angle), 6)
+        self.y[:] = self.prev_y[:] = np.round(radius * np.sin(angle), 6)
+        self.z[:] = self.prev_z[:] = 30.0
+        self.refill()
+    
+    def refill(self, index=slice(None)):
+        """Full health and pokeballs for one trainer (default: all of them)"""
+        self.health[index] = opponent_max_health
+        self.pokeballs[index] = OPPONENT_POKEBALLS
+    
+    def snapshot(self):
+        """Copy current positions into prev_* before a tick"""
+        self.prev_x[:] = self.x
+        self.prev_y[:] = self.y
+        self.prev_z[:] = self.z
+    
+    def nearest(self, x, y):
+        """Index of the trainer closest to (x, y), or -1 if there are none"""
+        if self.count == 0:
+            return -1
+        return int(np.argmin((self.x - x) ** 2 + (self.y - y) ** 2))
+
+# AI Opponent system - every trainer in one OpponentStore, throwing into one shared pool
 opponent_max_health = 100
-opponent_pokeballs = 10
-opponent_throw_cooldown = 0.0
-opponent_move_timer = 0.0
-opponent_direction = 0.0
-opponent_pokeballs_thrown = []
+OPPONENT_POKEBALLS = 10  # Pokeballs each trainer starts (and every rematch) with
+OPPONENT_SPACING = 60.0  # Ring circumference per trainer when many are spawned
+OPPONENT_SPEED = 15.0
+OPPONENT_THROW_RANGE = 300.0
+OPPONENT_THROW_SPEED = 200.0
+OPPONENT_THROW_COOLDOWN = 2.0
+OPPONENT_HITBOX = 20  # Radius the player's pokeballs must reach
+OPPONENT_BATCH_MIN = 16  # Opponent pokeballs in flight before they are swept as arrays
+opponent_count = 1  # Trainers spawned at the start of a match (--opponents)
+opponents = OpponentStore()
+opponents.spawn(opponent_count)
+opponent_pokeballs_thrown = ProjectilePool(PROJECTILE_POOL_SIZE)
 
 
 
@@ -105,6 +1237,21 @@ pokemon_types = [
     ["Arcanine", 1.0, 0.5, 0.0, 24, 0.4, 3.2, 95, "Fire", "mane"]
 ]
 
+# Per-species idle jitter: name -> (chance per tick, max offset in x/y)
+# Snorlax "sleeps" (tiny moves), Gengar "teleports", small Pokemon hop around
+pokemon_jitter = {
+    "Snorlax": (0.01, 2.0),
+    "Gengar": (0.005, 10.0),
+    "Pikachu": (0.02, 5.0),
+    "Eevee": (0.02, 5.0),
+}
+
+# Species tables indexed by pokemon type, for batched lookups
+pokemon_type_size = np.array([pdata[4] for pdata in pokemon_types], dtype=np.float64)
+pokemon_jitter_chance = np.array([pokemon_jitter.get(pdata[0], (0.0, 0.0))[0] for pdata in pokemon_types])
+pokemon_jitter_range = np.array([pokemon_jitter.get(pdata[0], (0.0, 0.0))[1] for pdata in pokemon_types])
+max_pokemon_size = float(pokemon_type_size.max())  # Widest body, for broadphase query radii
+
 # Pokeball types data
 pokeball_types = [
     # [name, r, g, b, catch_bonus, cost]
@@ -115,176 +1262,545 @@ pokeball_types = [
 ]
 
 # Terrain data - simple height map
-terrain_heights = {}
 BLOCK_SIZE = 20
+TERRAIN_CHUNK_RADIUS = 2  # Chunks of terrain drawn around the player's (the far plane is ~2 chunks)
+terrain_lists = {}  # Chunk key -> display list holding its compiled terrain mesh
 
-def draw_text(x, y, text, font=None):
-    # Use retro pixel font for authentic gaming feel
-    text_font = GLUT_BITMAP_9_BY_15
+# Instanced spheres - one shared mesh per kind, every copy drawn in one call
+INSTANCE_VERTEX_SHADER = """
+#version 120
+attribute vec3 position;
+attribute vec4 instance_sphere;
+attribute vec3 instance_color;
+varying vec4 color;
+
+void main() {
+    vec4 world = vec4(instance_sphere.xyz + position * instance_sphere.w, 1.0);
+    vec4 eye = gl_ModelViewMatrix * world;
+    gl_Position = gl_ProjectionMatrix * eye;
+    
+    // Ambient plus diffuse from LIGHT0, as GL_COLOR_MATERIAL lights GLUT spheres
+    vec3 normal = normalize(gl_NormalMatrix * position);
+    vec4 light = gl_LightSource[0].position;
+    vec3 to_light = normalize(light.xyz - eye.xyz * light.w);
+    vec4 shade = gl_LightModel.ambient + gl_LightSource[0].ambient
+               + gl_LightSource[0].diffuse * max(dot(normal, to_light), 0.0);
+    color = vec4(clamp(instance_color * shade.rgb, 0.0, 1.0), 1.0);
+}
+"""
+INSTANCE_FRAGMENT_SHADER = """
+#version 120
+varying vec4 color;
+
+void main() {
+    gl_FragColor = color;
+}
+"""
+instance_program = None  # Shader for instanced draws, False once found unsupported
+
+# Level of detail - sphere tessellation picked from projected size, impostors when tiny
+LOD_PIXEL_THRESHOLDS = (40.0, 15.0, 5.0)  # Projected radius in pixels needed for each finer level
+LOD_HYSTERESIS = 0.2  # Fraction a size must pass a threshold by before the level changes
+LOD_UNSET = -1  # Level of an entity that has not been drawn yet
+IMPOSTOR_TEXTURE_SIZE = 64
+impostor_texture = None  # Baked lit-sphere texture for impostor quads
+bush_spheres = SphereLods((8, 6, 4))
+pokemon_body_spheres = SphereLods((16, 10, 6))
+CLOUD_LOD_TESSELLATION = (10, 7, 4)  # Main cloud sphere; the puffs use a little less
+cloud_lods = {}  # (chunk, index into the cloud list) -> last detail level
+
+# Bush clusters - 8 spheres per bush, offsets and sizes as fractions of its radius
+BUSH_CLUSTER_OFFSETS = np.array([((j % 3 - 1) * 0.3, ((j // 3) % 3 - 1) * 0.3, (j // 6) * 0.2)
+                                 for j in range(8)])
+BUSH_CLUSTER_GREENS = np.array([0.3 + (j * 0.1) % 0.4 for j in range(8)])  # Slight variation
+BUSH_SPHERE_SCALE = 0.2  # Smaller than Pokemon
+
+class CameraState:
+    """The camera for one frame, computed once and read by every system.
+    
+    update() derives the eye, the look target and the forward/right/up axes
+    from the player's position, rotation and pitch, then the view and
+    projection matrices (row-major, for column vectors) and the frustum
+    planes. Culling, LOD, billboards, label projection and aiming read these
+    instead of redoing the trig per entity. Calling update() again with the
+    same inputs does nothing.
+    """
+    # Third person: behind the player and to the side (90 degrees counter-clockwise of the facing)
+    FOLLOW_DISTANCE = 60
+    FOLLOW_HEIGHT = 30
+    SHOULDER_OFFSET = 25
+    FOLLOW_LOOK_DISTANCE = 150
+    FOLLOW_LOOK_HEIGHT = 15
+    # First person
+    EYE_HEIGHT = 20
+    EYE_LOOK_DISTANCE = 200
+    
+    def __init__(self):
+        self.key = None  # Inputs of the last update()
+        self.eye = (0.0, 0.0, 0.0)
+        self.target = (1.0, 0.0, 0.0)
+        self.heading = (1.0, 0.0)  # cos and sin of the player's rotation
+        self.forward = (1.0, 0.0, 0.0)
+        self.right = np.array([1.0, 0.0, 0.0])  # Arrays, for billboard quads
+        self.up = np.array([0.0, 0.0, 1.0])
+        self.view = np.identity(4)
+        self.projection = np.identity(4)
+        self.clip_rows = ()  # Rows of projection @ view, for projecting single points
+        self.planes = None  # (6, 4) inward plane equations; None until the first update
+        self.plane_rows = []  # Same planes as tuples, for single-sphere tests
+        self.pixel_scale = 1.0  # Screen pixels per world unit at distance 1
+        self.viewport = (1, 1)
+    
+    def update(self, position, rotation, pitch, first_person, width, height):
+        key = (tuple(position), rotation, pitch, first_person, width, height)
+        if key == self.key:
+            return
+        self.key = key
+        
+        px, py, pz = position
+        yaw, tilt = math.radians(rotation), math.radians(pitch)
+        cos_r, sin_r = math.cos(yaw), math.sin(yaw)
+        cos_p, sin_p = math.cos(tilt), math.sin(tilt)
+        look_x, look_y, look_z = cos_r * cos_p, sin_r * cos_p, sin_p
+        if first_person:
+            eye = (px, py, pz + self.EYE_HEIGHT)
+            reach = self.EYE_LOOK_DISTANCE
+            target = (eye[0] + look_x * reach, eye[1] + look_y * reach, eye[2] + look_z * reach)
+        else:
+            # (-sin, cos) is the facing turned 90 degrees counter-clockwise
+            eye = (px - self.FOLLOW_DISTANCE * cos_r - self.SHOULDER_OFFSET * sin_r,
+                   py - self.FOLLOW_DISTANCE * sin_r + self.SHOULDER_OFFSET * cos_r,
+                   pz + self.FOLLOW_HEIGHT)
+            reach = self.FOLLOW_LOOK_DISTANCE
+            target = (px + look_x * reach, py + look_y * reach, pz + self.FOLLOW_LOOK_HEIGHT + look_z * reach)
+        self.eye, self.target, self.heading = eye, target, (cos_r, sin_r)
+        
+        # gluLookAt with +z up
+        forward = np.subtract(target, eye)
+        forward /= np.linalg.norm(forward)
+        right = np.array([forward[1], -forward[0], 0.0])  # forward x (0, 0, 1)
+        length = np.linalg.norm(right)
+        right = right / length if length > 1e-9 else np.array([sin_r, -cos_r, 0.0])  # Looking straight up or down
+        up = np.cross(right, forward)
+        view = np.identity(4)
+        view[0, :3], view[1, :3], view[2, :3] = right, up, -forward
+        view[:3, 3] = -(view[:3, :3] @ eye)
+        self.forward = tuple(forward.tolist())
+        self.right, self.up, self.view = right, up, view
+        
+        # gluPerspective
+        cot = 1.0 / math.tan(math.radians(fovY) / 2.0)
+        near, far = CAMERA_NEAR, CAMERA_FAR
+        projection = np.zeros((4, 4))
+        projection[0, 0] = cot * height / width
+        projection[1, 1] = cot
+        projection[2, 2] = (far + near) / (near - far)
+        projection[2, 3] = 2.0 * far * near / (near - far)
+        projection[3, 2] = -1.0
+        self.projection = projection
+        self.pixel_scale = cot * height / 2.0
+        self.viewport = (width, height)
+        
+        # Left, right, bottom, top, near, far - each plane points into the frustum
+        clip = projection @ view
+        planes = np.array([clip[3] + clip[0], clip[3] - clip[0],
+                           clip[3] + clip[1], clip[3] - clip[1],
+                           clip[3] + clip[2], clip[3] - clip[2]])
+        planes /= np.linalg.norm(planes[:, :3], axis=1)[:, None]
+        self.planes = planes
+        self.plane_rows = [tuple(plane) for plane in planes.tolist()]
+        self.clip_rows = tuple(tuple(row) for row in clip.tolist())
+    
+    def project(self, x, y, z):
+        """Window coordinates and depth of a world point (like gluProject), or None behind the eye"""
+        (ax, ay, az, aw), (bx, by, bz, bw), (cx, cy, cz, cw), (dx, dy, dz, dw) = self.clip_rows
+        w = dx * x + dy * y + dz * z + dw
+        if w <= 0.0:
+            return None
+        width, height = self.viewport
+        return (((ax * x + ay * y + az * z + aw) / w + 1.0) * 0.5 * width,
+                ((bx * x + by * y + bz * z + bw) / w + 1.0) * 0.5 * height,
+                ((cx * x + cy * y + cz * z + cw) / w + 1.0) * 0.5)
+
+camera = CameraState()  # The rendered view, from the interpolated player; set by setupCamera()
+aim_camera = CameraState()  # The same view from the simulation state, for aiming (replays exactly)
+AIM_DISTANCE = 200  # Throws head for the point this far along the view from the eye
+THROW_HAND_OFFSET = (10, 25, 20)  # Third-person throw origin: forward, sideways and up from the player
+
+# View culling - entities are tested by bounding sphere against the camera frustum
+cull_distance = float(CAMERA_FAR)  # Entities farther than this from the camera are skipped
+cull_stats = {}  # kind -> [drawn, culled] for the current frame
+CLOUD_BOUND_SCALE = 1.5  # Cloud cluster bounding radius as a multiple of its size
+OPPONENT_BOUND_RADIUS = 35  # Head to feet of the trainer rig
+
+# Character models - static rig parts compiled once, see CharacterModel
+character_rigs = {
+    # name -> shirt color, cap color, whether to draw the backpack and belt
+    "player": {"shirt_color": (0.2, 0.4, 0.8), "cap_color": (1.0, 0.0, 0.0), "trainer_gear": True},
+    "opponent": {"shirt_color": (0.8, 0.2, 0.2), "cap_color": (0.8, 0.2, 0.2), "trainer_gear": False},
+}
+character_models = {}  # name -> CharacterModel, built from the first frame that draws it
+
+class CharacterModel:
+    """A trainer rig baked into display lists.
+    
+    The torso, head, face, cap and gear are one list per rig; each limb is one
+    list shared by every rig. Drawing a character only places the body and
+    applies the walk-cycle swing at the shoulder and hip joints.
+    """
+    limb_lists = None  # (left arm, right arm, leg) display lists
+    
+    def __init__(self, shirt_color, cap_color, trainer_gear):
+        if CharacterModel.limb_lists is None:
+            CharacterModel.limb_lists = (compile_list(draw_rig_arm, -1),
+                                         compile_list(draw_rig_arm, 1),
+                                         compile_list(draw_rig_leg))
+        self.body_list = compile_list(draw_rig_body, shirt_color, cap_color, trainer_gear)
+    
+    def draw(self, x, y, z, heading, arm_swing, leg_swing):
+        left_arm, right_arm, leg = self.limb_lists
+        glPushMatrix()
+        glTranslatef(x, y, z)
+        glRotatef(heading, 0, 0, 1)
+        glRotatef(90, 0, 0, 1)  # Rotate body 90 degrees to the right
+        glCallList(self.body_list)
+        
+        # Arms and legs swing in opposite pairs
+        for jx, jz, swing, limb in ((-12, 6, arm_swing, left_arm),
+                                    (12, 6, -arm_swing, right_arm),
+                                    (-6, -12, -leg_swing, leg),
+                                    (6, -12, leg_swing, leg)):
+            glPushMatrix()
+            glTranslatef(jx, 0, jz)
+            glRotatef(swing, 1, 0, 0)
+            glCallList(limb)
+            glPopMatrix()
+        
+        glPopMatrix()
+
+# Text rendering - GLUT 9x15 glyphs baked into one texture, all text drawn in one batch
+FONT_FIRST_CHAR = 32  # Printable ASCII range kept in the atlas
+FONT_LAST_CHAR = 126
+FONT_COLUMNS = 16
+FONT_ROWS = 6
+FONT_CELL_WIDTH = 9  # Advance of GLUT_BITMAP_9_BY_15
+FONT_CELL_HEIGHT = 16
+FONT_BASELINE = 4  # Pixels from the bottom of a cell to the text baseline
+FONT_ATLAS_SIZE = (256, 128)  # Power-of-two texture holding the cells
+TEXT_COLOR = (0.0, 1.0, 0.8)  # Cyan/teal for retro gaming feel
+TEXT_SHADOW_COLOR = (0.0, 0.0, 0.0)
+TEXT_SHADOW_OFFSET = 1  # Drop shadow pixels right and down of HUD text
+NAME_SHADOW_OFFSET = 2  # Pokemon name labels cast a deeper shadow
+font_texture = None  # Built from the first frame that draws text
+glyph_cache = {}  # text -> glyph quads at the origin
+text_batch = []  # Vertex arrays queued for this frame
+
+def build_font_atlas():
+    """Render the GLUT 9x15 font once and read it back into an alpha texture"""
+    glPushAttrib(GL_ALL_ATTRIB_BITS)
+    glDisable(GL_LIGHTING)
+    glDisable(GL_DEPTH_TEST)
+    glDisable(GL_TEXTURE_2D)
+    glDisable(GL_BLEND)
+    glViewport(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT)
+    
     glMatrixMode(GL_PROJECTION)
     glPushMatrix()
     glLoadIdentity()
     gluOrtho2D(0, WINDOW_WIDTH, 0, WINDOW_HEIGHT)
-    
     glMatrixMode(GL_MODELVIEW)
     glPushMatrix()
     glLoadIdentity()
     
-    # Draw shadow (drop shadow for retro style)
-    glColor3f(0.0, 0.0, 0.0)
-    glRasterPos2f(x + 1, y - 1)
-    for ch in text:
-        glutBitmapCharacter(text_font, ord(ch))
-    
-    # Main retro text with bright neon colors
-    glColor3f(0.0, 1.0, 0.8)  # Cyan/teal for retro gaming feel
-    glRasterPos2f(x, y)
-    for ch in text:
-        glutBitmapCharacter(text_font, ord(ch))
+    # White glyphs on black, one per cell, into the back buffer
+    glClearColor(0.0, 0.0, 0.0, 1.0)
+    glClear(GL_COLOR_BUFFER_BIT)
+    glColor3f(1.0, 1.0, 1.0)
+    for code in range(FONT_FIRST_CHAR, FONT_LAST_CHAR + 1):
+        col, row = (code - FONT_FIRST_CHAR) % FONT_COLUMNS, (code - FONT_FIRST_CHAR) // FONT_COLUMNS
+        glRasterPos2f(col * FONT_CELL_WIDTH, row * FONT_CELL_HEIGHT + FONT_BASELINE)
+        glutBitmapCharacter(GLUT_BITMAP_9_BY_15, code)
+    glFinish()
+    
+    width = FONT_COLUMNS * FONT_CELL_WIDTH
+    height = FONT_ROWS * FONT_CELL_HEIGHT
+    glReadBuffer(GL_BACK)
+    glPixelStorei(GL_PACK_ALIGNMENT, 1)
+    pixels = glReadPixels(0, 0, width, height, GL_RED, GL_UNSIGNED_BYTE)
+    atlas = np.zeros((FONT_ATLAS_SIZE[1], FONT_ATLAS_SIZE[0]), dtype=np.uint8)
+    atlas[:height, :width] = np.frombuffer(bytes(pixels), dtype=np.uint8).reshape(height, width)
     
     glPopMatrix()
     glMatrixMode(GL_PROJECTION)
     glPopMatrix()
     glMatrixMode(GL_MODELVIEW)
+    glPopAttrib()
+    
+    texture = glGenTextures(1)
+    glBindTexture(GL_TEXTURE_2D, texture)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+    glTexImage2D(GL_TEXTURE_2D, 0, GL_ALPHA, FONT_ATLAS_SIZE[0], FONT_ATLAS_SIZE[1], 0,
+                 GL_ALPHA, GL_UNSIGNED_BYTE, atlas)
+    glBindTexture(GL_TEXTURE_2D, 0)
+    return texture
 
-def draw_terrain():
-    """Draw simple terrain using quads"""
-    glColor3f(0.2, 0.8, 0.2)  # Green grass color
-    
-    # Draw a simple grid-based terrain
-    for x in range(-GRID_LENGTH, GRID_LENGTH, BLOCK_SIZE):
-        for y in range(-GRID_LENGTH, GRID_LENGTH, BLOCK_SIZE):
-            # Simple height calculation
-            height = 5 * math.sin(x * 0.01) * math.cos(y * 0.01)
-            
-            glBegin(GL_QUADS)
-            glVertex3f(x, y, height)
-            glVertex3f(x + BLOCK_SIZE, y, height)
-            glVertex3f(x + BLOCK_SIZE, y + BLOCK_SIZE, height)
-            glVertex3f(x, y + BLOCK_SIZE, height)
-            glEnd()
+def glyph_quads(text):
+    """Quad corners [dx, dy, u, v] for a string drawn with its baseline at the origin (cached)"""
+    quads = glyph_cache.get(text)
+    if quads is not None:
+        return quads
+    
+    codes = np.frombuffer(text.encode("ascii", "replace"), dtype=np.uint8).astype(np.int64)
+    codes[(codes < FONT_FIRST_CHAR) | (codes > FONT_LAST_CHAR)] = ord("?")
+    index = codes - FONT_FIRST_CHAR
+    col, row = index % FONT_COLUMNS, index // FONT_COLUMNS
+    
+    u0 = col * FONT_CELL_WIDTH / FONT_ATLAS_SIZE[0]
+    v0 = row * FONT_CELL_HEIGHT / FONT_ATLAS_SIZE[1]
+    u1 = u0 + FONT_CELL_WIDTH / FONT_ATLAS_SIZE[0]
+    v1 = v0 + FONT_CELL_HEIGHT / FONT_ATLAS_SIZE[1]
+    x0 = np.arange(len(codes)) * FONT_CELL_WIDTH
+    x1 = x0 + FONT_CELL_WIDTH
+    y0, y1 = -FONT_BASELINE, FONT_CELL_HEIGHT - FONT_BASELINE
+    
+    quads = np.empty((len(codes), 4, 4), dtype=np.float32)
+    quads[:, 0] = np.stack([x0, np.full(len(codes), y0), u0, v0], axis=1)
+    quads[:, 1] = np.stack([x1, np.full(len(codes), y0), u1, v0], axis=1)
+    quads[:, 2] = np.stack([x1, np.full(len(codes), y1), u1, v1], axis=1)
+    quads[:, 3] = np.stack([x0, np.full(len(codes), y1), u0, v1], axis=1)
+    quads = quads.reshape(-1, 4)
+    
+    if len(glyph_cache) > 1024:  # HUD numbers change; don't grow forever
+        glyph_cache.clear()
+    glyph_cache[text] = quads
+    return quads
 
-def draw_opponent():
-    """Draw the AI opponent character (red version of player)"""
-    global opponent_move_timer
-    
-    glPushMatrix()
-    glTranslatef(opponent_pos[0], opponent_pos[1], opponent_pos[2])
-    glRotatef(opponent_direction, 0, 0, 1)
-    glRotatef(90, 0, 0, 1)  # Rotate body 90 degrees to the right
-    
-    # Calculate animation angles
-    arm_swing = math.sin(opponent_move_timer * 2) * 30
-    leg_swing = math.sin(opponent_move_timer * 2) * 20
-    
-    # Opponent body (torso) - Red shirt
-    glColor3f(0.8, 0.2, 0.2)  # Red shirt
-    glutSolidCube(18)
-    
-    # Shirt details
-    glColor3f(1.0, 1.0, 1.0)  # White collar
-    glPushMatrix()
-    glTranslatef(0, 0, 8)
-    glutSolidTorus(2, 8, 6, 6)
-    glPopMatrix()
-    
-    # Opponent head
-    glPushMatrix()
-    glTranslatef(0, 0, 16)
-    glColor3f(1.0, 0.8, 0.6)  # Skin color
-    glutSolidSphere(7, 10, 10)
-    
-    # Hair
-    glColor3f(0.3, 0.2, 0.1)  # Brown hair
-    glPushMatrix()
-    glTranslatef(0, 0, 4)
-    glutSolidSphere(6, 8, 8)
-    glPopMatrix()
-    
-    # Eyes
-    glColor3f(0.1, 0.1, 0.1)  # Black eyes
-    glPushMatrix()
-    glTranslatef(-2, 5, 2)
-    glutSolidSphere(1, 6, 6)
-    glTranslatef(4, 0, 0)
-    glutSolidSphere(1, 6, 6)
-    glPopMatrix()
-    
-    # Cap (Red opponent cap)
-    glColor3f(0.8, 0.2, 0.2)  # Red cap
-    glPushMatrix()
-    glTranslatef(0, 0, 6)
-    glutSolidSphere(5, 8, 8)
-    glPopMatrix()
+def text_vertices(x, y, text, color=TEXT_COLOR, depth=0.0, shadow=TEXT_SHADOW_OFFSET):
+    """Vertex arrays [x, y, z, u, v, r, g, b] for a string and its drop shadow at window pixel x, y"""
+    quads = glyph_quads(text)
+    if not len(quads):
+        return []
+    
+    arrays = []
+    for ox, oy, rgb in ((x + shadow, y - shadow, TEXT_SHADOW_COLOR), (x, y, color)):
+        vertices = np.empty((len(quads), 8), dtype=np.float32)
+        vertices[:, 0] = quads[:, 0] + ox
+        vertices[:, 1] = quads[:, 1] + oy
+        vertices[:, 2] = depth
+        vertices[:, 3:5] = quads[:, 2:4]
+        vertices[:, 5:8] = rgb
+        arrays.append(vertices)
+    return arrays
+
+def queue_text(x, y, text, color=TEXT_COLOR, depth=0.0, shadow=TEXT_SHADOW_OFFSET):
+    """Queue a string (plus its drop shadow) for this frame's text batch"""
+    text_batch.extend(text_vertices(x, y, text, color, depth, shadow))
+
+def flush_text():
+    """Draw every queued string in one call and empty the batch"""
+    if not text_batch:
+        return
+    if font_texture is None:  # Atlas not baked yet (showScreen bakes it)
+        text_batch.clear()
+        return
     
-    glPopMatrix()
+    vertices = np.concatenate(text_batch)
+    text_batch.clear()
+    positions = np.ascontiguousarray(vertices[:, 0:3])
+    texcoords = np.ascontiguousarray(vertices[:, 3:5])
+    colors = np.ascontiguousarray(vertices[:, 5:8])
+    
+    glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT | GL_TEXTURE_BIT)
+    glDisable(GL_LIGHTING)
+    glEnable(GL_TEXTURE_2D)
+    glBindTexture(GL_TEXTURE_2D, font_texture)
+    glEnable(GL_BLEND)
+    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+    # World labels keep their projected depth; HUD text sits at depth 0
+    glEnable(GL_DEPTH_TEST)
+    glDepthFunc(GL_LEQUAL)
+    glDepthMask(GL_FALSE)
     
-    # Left arm (swings opposite to right leg)
+    # Pixel coordinates, with vertex z mapped straight to window depth
+    glMatrixMode(GL_PROJECTION)
     glPushMatrix()
-    glTranslatef(-12, 0, 6)  # Position to left side of body
-    glRotatef(arm_swing, 1, 0, 0)  # Swing animation
-    glRotatef(90, 0, 1, 0)   # Rotate to make cylinder horizontal
-    glColor3f(1.0, 0.8, 0.6)  # Skin color
-    glutSolidCylinder(2.5, 12, 8, 8)  # Upper arm
-    glTranslatef(0, 0, 12)
-    glutSolidCylinder(2, 8, 6, 6)  # Forearm
-    glPopMatrix()
-    
-    # Right arm (swings opposite to left leg)
+    glLoadIdentity()
+    glOrtho(0, WINDOW_WIDTH, 0, WINDOW_HEIGHT, 0, -1)
+    glMatrixMode(GL_MODELVIEW)
     glPushMatrix()
-    glTranslatef(12, 0, 6)   # Position to right side of body
-    glRotatef(-arm_swing, 1, 0, 0)  # Swing animation (opposite direction)
-    glRotatef(-90, 0, 1, 0)  # Rotate to make cylinder horizontal
-    glColor3f(1.0, 0.8, 0.6)  # Skin color
-    glutSolidCylinder(2.5, 12, 8, 8)  # Upper arm
-    glTranslatef(0, 0, 12)
-    glutSolidCylinder(2, 8, 6, 6)  # Forearm
-    glPopMatrix()
+    glLoadIdentity()
     
-    # Left leg (swings opposite to right arm)
-    glPushMatrix()
-    glTranslatef(-6, 0, -12)  # Position to left side below body
-    glRotatef(-leg_swing, 1, 0, 0)  # Swing animation
-    glRotatef(90, 1, 0, 0)    # Rotate to make cylinder vertical
-    glColor3f(0.1, 0.1, 0.1)  # Black pants
-    glutSolidCylinder(3.5, 16, 8, 8)  # Thigh
-    glTranslatef(0, 0, 16)
-    glutSolidCylinder(3, 12, 6, 6)  # Shin
-    glPopMatrix()
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+    glEnableClientState(GL_COLOR_ARRAY)
+    glVertexPointer(3, GL_FLOAT, 0, positions)
+    glTexCoordPointer(2, GL_FLOAT, 0, texcoords)
+    glColorPointer(3, GL_FLOAT, 0, colors)
+    glDrawArrays(GL_QUADS, 0, len(vertices))
+    glDisableClientState(GL_COLOR_ARRAY)
+    glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+    glDisableClientState(GL_VERTEX_ARRAY)
     
-    # Right leg (swings opposite to left arm)
-    glPushMatrix()
-    glTranslatef(6, 0, -12)   # Position to right side below body
-    glRotatef(leg_swing, 1, 0, 0)  # Swing animation (opposite direction)
-    glRotatef(90, 1, 0, 0)    # Rotate to make cylinder vertical
-    glColor3f(0.1, 0.1, 0.1)  # Black pants
-    glutSolidCylinder(3.5, 16, 8, 8)  # Thigh
-    glTranslatef(0, 0, 12)
-    glutSolidCylinder(3, 12, 6, 6)  # Shin
     glPopMatrix()
-    
+    glMatrixMode(GL_PROJECTION)
     glPopMatrix()
+    glMatrixMode(GL_MODELVIEW)
+    glPopAttrib()
 
-def draw_player():
-    """Draw enhanced player character with better proportions and Pokemon trainer outfit"""
-    global is_walking, walk_cycle
-    
-    glPushMatrix()
-    glTranslatef(player_pos[0], player_pos[1], player_pos[2])
-    glRotatef(player_rotation, 0, 0, 1)
-    glRotatef(90, 0, 0, 1)  # Rotate body 90 degrees to the right
-    
-    # Calculate animation angles
-    arm_swing = 0
-    leg_swing = 0
-    if is_walking:
-        arm_swing = math.sin(walk_cycle) * 30  # 30 degree swing
-        leg_swing = math.sin(walk_cycle) * 20  # 20 degree swing
-        # Reset walking state (will be set again if still moving)
-        is_walking = False
-    
-    # Player body (torso) - Pokemon trainer shirt
-    glColor3f(0.2, 0.4, 0.8)  # Blue shirt
+def draw_text(x, y, text, font=None):
+    # Retro 9x15 pixel font with drop shadow, batched and drawn by flush_text()
+    queue_text(x, y, text)
+
+def build_terrain_list(key):
+    """Compile one chunk's terrain quads into a display list and return its id"""
+    x0, y0, x1, y1 = world_chunks.bounds(key)
+    x, y = np.meshgrid(np.arange(x0, x1, BLOCK_SIZE, dtype=np.float64),
+                       np.arange(y0, y1, BLOCK_SIZE, dtype=np.float64), indexing="ij")
+    # Simple height calculation: each block is flat at its corner's height
+    height = 5 * np.sin(x * 0.01) * np.cos(y * 0.01)
+    corners = [(x, y), (x + BLOCK_SIZE, y), (x + BLOCK_SIZE, y + BLOCK_SIZE), (x, y + BLOCK_SIZE)]
+    quads = np.stack([np.stack([cx, cy, height], axis=-1) for cx, cy in corners], axis=2)
+    vertices = np.ascontiguousarray(quads.reshape(-1, 3), dtype=np.float32)
+    
+    list_id = glGenLists(1)
+    glNewList(list_id, GL_COMPILE)
+    glColor3f(0.2, 0.8, 0.2)  # Green grass color
+    # One batch for the whole chunk; the array is copied into the list
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glVertexPointer(3, GL_FLOAT, 0, vertices)
+    glDrawArrays(GL_QUADS, 0, len(vertices))
+    glDisableClientState(GL_VERTEX_ARRAY)
+    glEndList()
+    return list_id
+
+def draw_terrain():
+    """Draw the terrain of the chunks around the player (each cached in a display list)"""
+    center = world_chunks.key_of(player_pos[0], player_pos[1])
+    
+    # Free the meshes of chunks left well behind
+    for key in list(terrain_lists):
+        if max(abs(key[0] - center[0]), abs(key[1] - center[1])) > TERRAIN_CHUNK_RADIUS + 1:
+            glDeleteLists(terrain_lists.pop(key), 1)
+    
+    half = CHUNK_SIZE / 2.0
+    drawn = culled = 0
+    for key in world_chunks.keys_around(center, TERRAIN_CHUNK_RADIUS):
+        x0, y0, x1, y1 = world_chunks.bounds(key)
+        if x0 < -GRID_LENGTH or y0 < -GRID_LENGTH or x1 > GRID_LENGTH or y1 > GRID_LENGTH:
+            continue  # Past the edge of the world
+        if not sphere_in_view(x0 + half, y0 + half, 0.0, half * math.sqrt(2)):
+            culled += 1
+            continue
+        drawn += 1
+        if key not in terrain_lists:
+            terrain_lists[key] = build_terrain_list(key)
+        glCallList(terrain_lists[key])
+    record_culling("terrain", drawn, culled)
+
+def sphere_triangles(slices, stacks):
+    """Unit sphere around the z axis as a flat GL_TRIANGLES float32 vertex array"""
+    theta = np.linspace(0.0, math.pi, stacks + 1)[:, None]  # From the +z pole down
+    phi = np.linspace(0.0, 2.0 * math.pi, slices + 1)[None, :]
+    grid = np.stack(np.broadcast_arrays(np.sin(theta) * np.cos(phi),
+                                        np.sin(theta) * np.sin(phi),
+                                        np.cos(theta)), axis=-1)
+    
+    # Two triangles per stack/slice cell, counter-clockwise from outside
+    top_left, top_right = grid[:-1, :-1], grid[:-1, 1:]
+    bottom_left, bottom_right = grid[1:, :-1], grid[1:, 1:]
+    triangles = np.stack([top_left, bottom_left, bottom_right,
+                          top_left, bottom_right, top_right], axis=2)
+    return np.ascontiguousarray(triangles.reshape(-1, 3), dtype=np.float32)
+
+def get_instance_program():
+    """Return the instanced-sphere shader program, or False if it is unsupported"""
+    global instance_program
+    if instance_program is None:
+        instance_program = False
+        try:
+            if bool(glDrawArraysInstanced) and bool(glVertexAttribDivisor):
+                vertex = shaders.compileShader(INSTANCE_VERTEX_SHADER, GL_VERTEX_SHADER)
+                fragment = shaders.compileShader(INSTANCE_FRAGMENT_SHADER, GL_FRAGMENT_SHADER)
+                program = glCreateProgram()
+                glAttachShader(program, vertex)
+                glAttachShader(program, fragment)
+                for location, name in enumerate(("position", "instance_sphere", "instance_color")):
+                    glBindAttribLocation(program, location, name)
+                glLinkProgram(program)
+                if glGetProgramiv(program, GL_LINK_STATUS):
+                    instance_program = program
+        except Exception as error:  # No GLSL or instancing: draw one sphere at a time
+            event_log.warning(f"Instanced rendering unavailable, using display lists: {error}")
+    return instance_program
+
+def build_impostor_texture():
+    """Bake a lit sphere into a luminance/alpha texture for impostor quads"""
+    size = IMPOSTOR_TEXTURE_SIZE
+    coords = (np.arange(size) + 0.5) / size * 2.0 - 1.0
+    x, y = np.meshgrid(coords, coords)
+    inside = x * x + y * y <= 1.0
+    z = np.sqrt(np.clip(1.0 - x * x - y * y, 0.0, 1.0))
+    
+    # Same ambient + diffuse split as LIGHT0, lit from above the viewer
+    light = np.array([0.0, 0.6, 0.8])
+    diffuse = np.clip(x * light[0] + y * light[1] + z * light[2], 0.0, 1.0)
+    shade = np.clip(0.6 + 0.8 * diffuse, 0.0, 1.0)
+    pixels = np.empty((size, size, 2), dtype=np.uint8)
+    pixels[..., 0] = (shade * 255).astype(np.uint8)
+    pixels[..., 1] = np.where(inside, 255, 0)
+    
+    texture = glGenTextures(1)
+    glBindTexture(GL_TEXTURE_2D, texture)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+    glTexImage2D(GL_TEXTURE_2D, 0, GL_LUMINANCE_ALPHA, size, size, 0,
+                 GL_LUMINANCE_ALPHA, GL_UNSIGNED_BYTE, pixels)
+    glBindTexture(GL_TEXTURE_2D, 0)
+    return texture
+
+def select_lods(centers, radii, previous):
+    """Pick detail levels for spheres from their projected radius in pixels.
+    
+    Level k is the first of LOD_PIXEL_THRESHOLDS the sphere still reaches;
+    past the last threshold it is an impostor (len(LOD_PIXEL_THRESHOLDS)).
+    A sphere keeps its previous level until it crosses a threshold by more
+    than LOD_HYSTERESIS, so entities near a boundary don't flicker.
+    Pass LOD_UNSET in previous for entities without a level yet.
+    """
+    offsets = centers - np.asarray(camera.eye)
+    distances = np.maximum(np.sqrt(np.einsum("ij,ij->i", offsets, offsets)), CAMERA_NEAR)
+    pixels = (radii * camera.pixel_scale / distances)[:, None]
+    thresholds = np.asarray(LOD_PIXEL_THRESHOLDS)
+    
+    levels = np.sum(pixels < thresholds, axis=1)
+    finest = np.sum(pixels < thresholds * (1.0 - LOD_HYSTERESIS), axis=1)
+    coarsest = np.sum(pixels < thresholds * (1.0 + LOD_HYSTERESIS), axis=1)
+    previous = np.asarray(previous)
+    return np.where(previous == LOD_UNSET, levels, np.clip(previous, finest, coarsest))
+
+def select_lod(x, y, z, radius, previous):
+    """select_lods() for a single sphere"""
+    ex, ey, ez = camera.eye
+    distance = max(math.sqrt((x - ex)**2 + (y - ey)**2 + (z - ez)**2), CAMERA_NEAR)
+    pixels = radius * camera.pixel_scale / distance
+    level = finest = coarsest = 0
+    for threshold in LOD_PIXEL_THRESHOLDS:
+        level += pixels < threshold
+        finest += pixels < threshold * (1.0 - LOD_HYSTERESIS)
+        coarsest += pixels < threshold * (1.0 + LOD_HYSTERESIS)
+    if previous == LOD_UNSET:
+        return level
+    return min(max(previous, finest), coarsest)
+
+def draw_rig_body(shirt_color, cap_color, trainer_gear):
+    """Issue the static parts of a character: torso, head, face, cap and gear"""
+    # Body (torso) - trainer shirt
+    glColor3f(*shirt_color)
     glutSolidCube(18)
     
     # Shirt details
@@ -294,7 +1810,7 @@ def draw_player():
     glutSolidTorus(2, 8, 6, 6)
     glPopMatrix()
     
-    # Player head
+    # Head
     glPushMatrix()
     glTranslatef(0, 0, 16)
     glColor3f(1.0, 0.8, 0.6)  # Skin color
@@ -317,7 +1833,7 @@ def draw_player():
     glPopMatrix()
     
     # Cap (Pokemon trainer cap)
-    glColor3f(1.0, 0.0, 0.0)  # Red cap
+    glColor3f(*cap_color)
     glPushMatrix()
     glTranslatef(0, 0, 6)
     glutSolidSphere(5, 8, 8)
@@ -325,49 +1841,8 @@ def draw_player():
     
     glPopMatrix()
     
-    # Left arm (swings opposite to right leg)
-    glPushMatrix()
-    glTranslatef(-12, 0, 6)  # Position to left side of body
-    glRotatef(arm_swing, 1, 0, 0)  # Swing animation
-    glRotatef(90, 0, 1, 0)   # Rotate to make cylinder horizontal
-    glColor3f(1.0, 0.8, 0.6)  # Skin color
-    glutSolidCylinder(2.5, 12, 8, 8)  # Upper arm
-    glTranslatef(0, 0, 12)
-    glutSolidCylinder(2, 8, 6, 6)  # Forearm
-    glPopMatrix()
-    
-    # Right arm (swings opposite to left leg)
-    glPushMatrix()
-    glTranslatef(12, 0, 6)   # Position to right side of body
-    glRotatef(-arm_swing, 1, 0, 0)  # Swing animation (opposite direction)
-    glRotatef(-90, 0, 1, 0)  # Rotate to make cylinder horizontal
-    glColor3f(1.0, 0.8, 0.6)  # Skin color
-    glutSolidCylinder(2.5, 12, 8, 8)  # Upper arm
-    glTranslatef(0, 0, 12)
-    glutSolidCylinder(2, 8, 6, 6)  # Forearm
-    glPopMatrix()
-    
-    # Left leg (swings opposite to right arm)
-    glPushMatrix()
-    glTranslatef(-6, 0, -12)  # Position to left side below body
-    glRotatef(-leg_swing, 1, 0, 0)  # Swing animation
-    glRotatef(90, 1, 0, 0)    # Rotate to make cylinder vertical
-    glColor3f(0.1, 0.1, 0.1)  # Black pants
-    glutSolidCylinder(3.5, 16, 8, 8)  # Thigh
-    glTranslatef(0, 0, 16)
-    glutSolidCylinder(3, 12, 6, 6)  # Shin
-    glPopMatrix()
-    
-    # Right leg (swings opposite to left arm)
-    glPushMatrix()
-    glTranslatef(6, 0, -12)   # Position to right side below body
-    glRotatef(leg_swing, 1, 0, 0)  # Swing animation (opposite direction)
-    glRotatef(90, 1, 0, 0)    # Rotate to make cylinder vertical
-    glColor3f(0.1, 0.1, 0.1)  # Black pants
-    glutSolidCylinder(3.5, 16, 8, 8)  # Thigh
-    glTranslatef(0, 0, 16)
-    glutSolidCylinder(3, 12, 6, 6)  # Shin
-    glPopMatrix()
+    if not trainer_gear:
+        return
     
     # Backpack (Pokemon trainer backpack)
     glPushMatrix()
@@ -396,35 +1871,120 @@ def draw_player():
     glPopMatrix()
     
     glPopMatrix()
-    
+
+def draw_rig_arm(side):
+    """Issue one arm (upper arm and forearm) pointing out to the given side (-1 or 1)"""
+    glRotatef(-90 * side, 0, 1, 0)  # Rotate to make cylinder horizontal
+    glColor3f(1.0, 0.8, 0.6)  # Skin color
+    glutSolidCylinder(2.5, 12, 8, 8)  # Upper arm
+    glTranslatef(0, 0, 12)
+    glutSolidCylinder(2, 8, 6, 6)  # Forearm
+
+def draw_rig_leg():
+    """Issue one leg (thigh and shin) hanging down from the hip"""
+    glRotatef(90, 1, 0, 0)  # Rotate to make cylinder vertical
+    glColor3f(0.1, 0.1, 0.1)  # Black pants
+    glutSolidCylinder(3.5, 16, 8, 8)  # Thigh
+    glTranslatef(0, 0, 16)
+    glutSolidCylinder(3, 12, 6, 6)  # Shin
+
+def compile_list(draw_function, *args):
+    """Record draw_function(*args) into a new display list and return its id"""
+    list_id = glGenLists(1)
+    glNewList(list_id, GL_COMPILE)
+    glPushMatrix()
+    draw_function(*args)
     glPopMatrix()
+    glEndList()
+    return list_id
+
+def get_character_model(name):
+    """Return the compiled CharacterModel for a rig, building it on first use"""
+    model = character_models.get(name)
+    if model is None:
+        model = CharacterModel(**character_rigs[name])
+        character_models[name] = model
+    return model
+
+def opponent_render_positions():
+    """(n, 3) opponent positions blended between the last two ticks for drawing"""
+    store = opponents
+    a = render_alpha
+    return np.stack([store.prev_x + (store.x - store.prev_x) * a,
+                     store.prev_y + (store.y - store.prev_y) * a,
+                     store.prev_z + (store.z - store.prev_z) * a], axis=1)
+
+def draw_opponents():
+    """Draw the AI opponent characters (red versions of the player)"""
+    n = opponents.count
+    if n == 0:
+        return
+    centers = opponent_render_positions()
+    visible = spheres_in_view(centers, np.full(n, float(OPPONENT_BOUND_RADIUS)))
+    record_culling("opponent", int(visible.sum()), n - int(visible.sum()))
+    
+    model = get_character_model("opponent")
+    for i in np.flatnonzero(visible).tolist():
+        # Calculate animation angles
+        arm_swing = math.sin(opponents.move_timer[i] * 2) * 30
+        leg_swing = math.sin(opponents.move_timer[i] * 2) * 20
+        ox, oy, oz = centers[i].tolist()
+        model.draw(ox, oy, oz, float(opponents.direction[i]), arm_swing, leg_swing)
+
+def draw_player():
+    """Draw enhanced player character with better proportions and Pokemon trainer outfit"""
+    px, py, pz = lerp_position(player_pos)
+    
+    # Calculate animation angles
+    arm_swing = 0
+    leg_swing = 0
+    if is_walking:
+        arm_swing = math.sin(walk_cycle) * 30  # 30 degree swing
+        leg_swing = math.sin(walk_cycle) * 20  # 20 degree swing
+    
+    get_character_model("player").draw(px, py, pz, player_rotation, arm_swing, leg_swing)
 
 def draw_pokemon():
     """Draw all pokemon with unique visual features - only visible ones"""
-    for i in range(len(pokemon_list)):
-        pokemon = pokemon_list[i]
-        if len(pokemon) < 8 or pokemon[6]:  # Skip if caught
+    cam_x, cam_y, cam_z = camera.eye  # Health bars turn to face it
+    store = pokemon_store
+    drawn = culled = 0
+    for i in range(store.count):
+        if store.caught[i]:  # Skip if caught
             continue
         
         # Only draw Pokemon if they are visible (player radius intersects bush)
         if not is_pokemon_visible(i):
             continue
             
-        x, y, z, ptype, health, max_health = pokemon[0], pokemon[1], pokemon[2], pokemon[3], pokemon[4], pokemon[5]
+        x, y, z = pokemon_render_position(i)
+        ptype, health, max_health = store.ptype[i], store.health[i], store.max_health[i]
+        move_timer = store.move_timer[i]
+        
+        # Bounds cover the features, the float and the health bar overhead
+        size = pokemon_type_size[ptype]
+        if not sphere_in_view(x, y, z + 20 + size, 2 * size + 15):
+            culled += 1
+            continue
+        drawn += 1
         
         glPushMatrix()
         glTranslatef(x, y, z + 20)  # Ensure Pokemon are above ground level
         
         # Add floating animation
-        float_offset = math.sin(pokemon[9] * 2) * 3  # Use move_timer for animation
+        float_offset = math.sin(move_timer * 2) * 3  # Use move_timer for animation
         glTranslatef(0, 0, float_offset)
         
-        # Pokemon body
+        # Pokemon body, drawn with every other body in one batch below
         pdata = pokemon_types[ptype]
+        level = select_lod(x, y, z + 20 + float_offset, pdata[4], store.lod[i])
+        store.lod[i] = level
+        pokemon_body_spheres.queue(level, x, y, z + 20 + float_offset, pdata[4], pdata[1], pdata[2], pdata[3])
         glColor3f(pdata[1], pdata[2], pdata[3])  # Pokemon color
         
-        # Draw Pokemon-specific shapes and features
-        draw_pokemon_features(pdata, pokemon[9])  # Pass animation time
+        # Draw Pokemon-specific shapes and features (too small to see on impostors)
+        if level < pokemon_body_spheres.impostor_level:
+            draw_pokemon_features(pdata, move_timer)  # Pass animation time
         
         # Health bar above pokemon - billboarded to always face camera
         glTranslatef(0, 0, pdata[4] + 15)
@@ -432,21 +1992,6 @@ def draw_pokemon():
         # Calculate billboard rotation to face camera
         glPushMatrix()
         
-        # Calculate actual camera position based on player position and rotation
-        if is_first_person:
-            # First person camera position
-            cam_x = player_pos[0]
-            cam_y = player_pos[1]
-            cam_z = player_pos[2] + 15
-        else:
-            # Over-the-shoulder camera position (match setupCamera)
-            camera_distance = 60
-            camera_height = 30
-            shoulder_offset = 25
-            cam_x = player_pos[0] - camera_distance * math.cos(math.radians(player_rotation)) + shoulder_offset * math.cos(math.radians(player_rotation + 90))
-            cam_y = player_pos[1] - camera_distance * math.sin(math.radians(player_rotation)) + shoulder_offset * math.sin(math.radians(player_rotation + 90))
-            cam_z = player_pos[2] + camera_height
-        
         bar_x, bar_y, bar_z = x, y, z + pdata[4] + 15
         
         # Direction vector from health bar to camera
@@ -456,14 +2001,15 @@ def draw_pokemon():
         
         # Calculate rotation angles to face camera
         # Rotation around Z-axis (yaw)
-        yaw_angle = math.atan2(dir_y, dir_x) * 180.0 / math.pi
-        glRotatef(yaw_angle, 0, 0, 1)
+        yaw = math.atan2(dir_y, dir_x)
+        glRotatef(math.degrees(yaw), 0, 0, 1)
         
         # Rotation around Y-axis (pitch) - calculate pitch from horizontal distance and vertical distance
         horizontal_dist = math.sqrt(dir_x * dir_x + dir_y * dir_y)
+        pitch = 0.0
         if horizontal_dist > 0:
-            pitch_angle = math.atan2(dir_z, horizontal_dist) * 180.0 / math.pi
-            glRotatef(-pitch_angle, 0, 1, 0)
+            pitch = math.atan2(dir_z, horizontal_dist)
+            glRotatef(-math.degrees(pitch), 0, 1, 0)
         
         # Health bar background
         glColor3f(0.3, 0.3, 0.3)
@@ -491,31 +2037,31 @@ def draw_pokemon():
         glEnd()
         
         # Pokemon name above health bar
-        # Pixelated name label using 9x15 with shadow
+        # Pixelated name label using 9x15 with shadow, projected to the screen
+        # and queued with the rest of the frame's text. The bar's rotations are
+        # applied here in Python, so no matrices are read back from OpenGL
         name_x = -len(pdata[0]) * 4
         name_y = 5
-        glColor3f(0.0, 0.0, 0.0)
-        glRasterPos3f(name_x + 2, name_y - 2, 0)
-        for char in pdata[0]:
-            glutBitmapCharacter(GLUT_BITMAP_9_BY_15, ord(char))
-        glColor3f(1.0, 1.0, 0.6)
-        glRasterPos3f(name_x, name_y, 0)
-        for char in pdata[0]:
-            glutBitmapCharacter(GLUT_BITMAP_9_BY_15, ord(char))
+        along = name_x * math.cos(pitch)
+        window = camera.project(x + along * math.cos(yaw) - name_y * math.sin(yaw),
+                                y + along * math.sin(yaw) + name_y * math.cos(yaw),
+                                z + 20 + float_offset + pdata[4] + 15 + name_x * math.sin(pitch))
+        if window is not None and 0.0 <= window[2] <= 1.0:  # In front of the camera
+            queue_text(window[0], window[1], pdata[0], (1.0, 1.0, 0.6), window[2], NAME_SHADOW_OFFSET)
         
         glPopMatrix()
         
         glPopMatrix()
+    
+    pokemon_body_spheres.flush()
+    record_culling("pokemon", drawn, culled)
 
 def draw_pokemon_features(pdata, animation_time):
-    """Draw unique features for each Pokemon type"""
+    """Draw unique features for each Pokemon type (the body sphere is instanced)"""
     name = pdata[0]
     size = pdata[4]
     color = (pdata[1], pdata[2], pdata[3])
     
-    # Main body - make it more visible
-    glutSolidSphere(size, 16, 16)
-    
     # Pokemon-specific features
     if name == "Pikachu":
         # Yellow ears
@@ -699,12 +2245,17 @@ def draw_pokemon_features(pdata, animation_time):
 
 def draw_pokeballs():
     """Draw all thrown pokeballs"""
+    drawn = culled = 0
     for i in range(len(pokeballs_thrown)):
         pokeball = pokeballs_thrown[i]
         if len(pokeball) < 7 or not pokeball[6]:  # Skip if not active
             continue
             
-        x, y, z = pokeball[0], pokeball[1], pokeball[2]
+        x, y, z = lerp_position(pokeball)
+        if not sphere_in_view(x, y, z, 9):
+            culled += 1
+            continue
+        drawn += 1
         
         glPushMatrix()
         glTranslatef(x, y, z)
@@ -721,14 +2272,20 @@ def draw_pokeballs():
         glutSolidSphere(8, 8, 8)
         
         glPopMatrix()
+    record_culling("projectiles", drawn, culled)
 
 def draw_opponent_pokeballs():
     """Draw all opponent pokeballs"""
+    drawn = culled = 0
     for pokeball in opponent_pokeballs_thrown:
         if not pokeball[6]:  # Skip if not active
             continue
         
-        x, y, z = pokeball[0], pokeball[1], pokeball[2]
+        x, y, z = lerp_position(pokeball)
+        if not sphere_in_view(x, y, z, 3):
+            culled += 1
+            continue
+        drawn += 1
         
         glPushMatrix()
         glTranslatef(x, y, z)
@@ -738,15 +2295,21 @@ def draw_opponent_pokeballs():
         glutSolidSphere(3, 8, 8)
         
         glPopMatrix()
+    record_culling("projectiles", drawn, culled)
 
 def draw_rocks():
     """Draw all thrown rocks"""
+    drawn = culled = 0
     for i in range(len(rocks_thrown)):
         rock = rocks_thrown[i]
         if len(rock) < 7 or not rock[6]:  # Skip if not active
             continue
             
-        x, y, z = rock[0], rock[1], rock[2]
+        x, y, z = lerp_position(rock)
+        if not sphere_in_view(x, y, z, 6):
+            culled += 1
+            continue
+        drawn += 1
         
         glPushMatrix()
         glTranslatef(x, y, z)
@@ -756,42 +2319,45 @@ def draw_rocks():
         glutSolidSphere(6, 6, 6)
         
         glPopMatrix()
+    record_culling("projectiles", drawn, culled)
 
 def draw_bushes():
     """Draw all bushes using OpenGL primitives - only if they should be visible"""
-    for i in range(len(bush_list)):
-        bush = bush_list[i]
-        if len(bush) < 5:
-            continue
-            
-        # Only draw bush if it should be visible (not intersecting with player radius)
-        if not is_bush_visible(i):
-            continue
-            
-        x, y, z, radius = bush[0], bush[1], bush[2], bush[3]
-        
-        # Draw multiple spheres to create a bush effect
-        for j in range(8):  # 8 spheres per bush
-            glPushMatrix()
-            
-            # Random offset for each sphere within the bush radius
-            offset_x = (j % 3 - 1) * radius * 0.3
-            offset_y = ((j // 3) % 3 - 1) * radius * 0.3
-            offset_z = (j // 6) * radius * 0.2
-            
-            glTranslatef(x + offset_x, y + offset_y, z + offset_z)
-            
-            # Green bush color with slight variation
-            green_variation = 0.3 + (j * 0.1) % 0.4
-            glColor3f(0.1, green_variation, 0.1)
-            glutSolidSphere(radius * 0.2, 8, 8)  # Reduced size to be smaller than Pokemon
-            
-            glPopMatrix()
+    revealed = bush_visibility.revealed
+    visible = [bush for bush in bush_list if bush[6] not in revealed]
+    if not visible:
+        return
+    
+    # Multiple spheres per bush create the bush effect, all drawn in one call
+    bushes = np.array([bush[:4] for bush in visible], dtype=np.float64)
+    in_view = spheres_in_view(bushes[:, 0:3], bushes[:, 3])  # Clusters stay within the bush radius
+    record_culling("bushes", int(in_view.sum()), len(bushes) - int(in_view.sum()))
+    bushes = bushes[in_view]
+    if not len(bushes):
+        return
+    drawn_bushes = [bush for bush, shown in zip(visible, in_view.tolist()) if shown]
+    radius = bushes[:, 3:4]
+    count = len(bushes) * len(BUSH_CLUSTER_OFFSETS)
+    instances = np.empty((count, InstancedSpheres.ROW_SIZE), dtype=np.float32)
+    instances[:, 0:3] = (bushes[:, None, 0:3] + radius[:, :, None] * BUSH_CLUSTER_OFFSETS).reshape(-1, 3)
+    instances[:, 3] = np.repeat(radius[:, 0] * BUSH_SPHERE_SCALE, len(BUSH_CLUSTER_OFFSETS))
+    instances[:, 4] = 0.1
+    instances[:, 5] = np.tile(BUSH_CLUSTER_GREENS, len(bushes))
+    instances[:, 6] = 0.1
+    
+    # One detail level per bush, from the size of its cluster spheres
+    levels = select_lods(bushes[:, 0:3], radius[:, 0] * BUSH_SPHERE_SCALE,
+                         [bush[5] for bush in drawn_bushes])
+    for bush, level in zip(drawn_bushes, levels.tolist()):
+        bush[5] = level
+    bush_spheres.queue_block(instances, np.repeat(levels, len(BUSH_CLUSTER_OFFSETS)))
+    bush_spheres.flush()
 
 def draw_player_radius():
     """Draw visible player detection radius using OpenGL lines"""
+    px, py, _ = lerp_position(player_pos)
     glPushMatrix()
-    glTranslatef(player_pos[0], player_pos[1], 5)  # Slightly above ground
+    glTranslatef(px, py, 5)  # Slightly above ground
     
     # Draw circle using line segments
     glColor3f(0.0, 1.0, 1.0)  # Cyan color for visibility
@@ -815,47 +2381,67 @@ def draw_player_radius():
 
 def is_pokemon_visible(pokemon_index):
     """Check if Pokemon should be visible based on player radius intersection with bush"""
-    if pokemon_index >= len(pokemon_list) or pokemon_index >= len(bush_list):
-        return False
-    
-    pokemon = pokemon_list[pokemon_index]
-    bush = bush_list[pokemon_index]
-    
-    if len(pokemon) < 7 or len(bush) < 5:
+    if pokemon_index >= pokemon_store.count:
         return False
     
-    if pokemon[6]:  # Pokemon is caught
+    if pokemon_store.caught[pokemon_index]:  # Pokemon is caught
         return False
     
-    # Calculate distance between player and bush center
-    bush_x, bush_y, bush_radius = bush[0], bush[1], bush[3]
-    distance = math.sqrt(
-        (player_pos[0] - bush_x)**2 + 
-        (player_pos[1] - bush_y)**2
-    )
-    
-    # Check if player radius intersects with bush radius
-    return distance <= (player_radius + bush_radius)
+    # Shown while the player radius reaches its bush (see VisibilitySet)
+    return int(pokemon_store.bush[pokemon_index]) in bush_visibility.revealed
 
 def is_bush_visible(bush_index):
     """Check if bush should be visible - bushes disappear when player radius intersects"""
     if bush_index >= len(bush_list):
         return False
     
-    bush = bush_list[bush_index]
-    
-    if len(bush) < 5:
-        return False
-    
-    # Calculate distance between player and bush center
-    bush_x, bush_y, bush_radius = bush[0], bush[1], bush[3]
-    distance = math.sqrt(
-        (player_pos[0] - bush_x)**2 + 
-        (player_pos[1] - bush_y)**2
-    )
-    
-    # Bush is visible when player radius does NOT intersect with bush radius
-    return distance > (player_radius + bush_radius)
+    return bush_list[bush_index][6] not in bush_visibility.revealed
+
+def draw_profiler_overlay():
+    """Frame-time graph and average/p99 stage breakdown from the profiler"""
+    global profiler_stats, profiler_stats_age
+    
+    profiler_stats_age += 1
+    if profiler_stats is None or profiler_stats_age >= PROFILER_REFRESH_FRAMES:
+        profiler_stats = profiler.stats()
+        profiler_stats_age = 0
+    (frame_avg, frame_p99), stages = profiler_stats
+    
+    left = WINDOW_WIDTH - 20 - PROFILER_FRAMES
+    top = WINDOW_HEIGHT - 130
+    queue_text(left, top, f"Frame  avg {frame_avg:5.2f} ms  p99 {frame_p99:5.2f} ms")
+    for line, (name, average, p99) in enumerate(stages[:PROFILER_STAGE_LINES]):
+        color = profiler_stage_colors.get(name, TEXT_COLOR)
+        queue_text(left, top - 16 * (line + 1), f"{name[:18]:<18} {average:5.2f} {p99:6.2f}", color)
+    
+    # One column per buffered frame, stacked by top-level stage
+    bottom = top - 16 * (PROFILER_STAGE_LINES + 1) - PROFILER_GRAPH_HEIGHT
+    scale = PROFILER_GRAPH_HEIGHT / PROFILER_GRAPH_MS
+    glPushAttrib(GL_ENABLE_BIT | GL_CURRENT_BIT)
+    glDisable(GL_LIGHTING)
+    glColor3f(0.1, 0.1, 0.1)
+    glBegin(GL_QUADS)
+    glVertex2f(left, bottom)
+    glVertex2f(left + PROFILER_FRAMES, bottom)
+    glVertex2f(left + PROFILER_FRAMES, bottom + PROFILER_GRAPH_HEIGHT)
+    glVertex2f(left, bottom + PROFILER_GRAPH_HEIGHT)
+    for column, (_, _, events) in enumerate(profiler.frames):
+        x = left + column
+        y = bottom
+        for name, _, seconds, depth in events:
+            if depth:
+                continue
+            if name not in profiler_stage_colors:
+                profiler_stage_colors[name] = PROFILER_COLORS[len(profiler_stage_colors) % len(PROFILER_COLORS)]
+            height = min(seconds * 1e3 * scale, bottom + PROFILER_GRAPH_HEIGHT - y)
+            glColor3f(*profiler_stage_colors[name])
+            glVertex2f(x, y)
+            glVertex2f(x + 1, y)
+            glVertex2f(x + 1, y + height)
+            glVertex2f(x, y + height)
+            y += height
+    glEnd()
+    glPopAttrib()
 
 def draw_game_over_screen():
     """Draw game over screen with restart button"""
@@ -910,219 +2496,580 @@ def draw_hud():
     glVertex2f(22, WINDOW_HEIGHT - 22)
     glEnd()
     
+    # Game stats, pokemon info and event message (cached until a game event changes them)
+    refresh_hud_nearest()
+    refresh_hud_opponent()
+    if hud.dirty:
+        rebuild_hud_text()
+    text_batch.extend(hud.text)
+    
+    # Culling report for this frame - it changes whenever the camera turns, so
+    # it is queued on its own instead of invalidating the cached text
+    drawn, culled = cull_totals()
+    queue_text(WINDOW_WIDTH - 200, WINDOW_HEIGHT - 100, f"Drawn: {drawn} Culled: {culled}")
+    
+    # Crosshair in center of screen
+    center_x = WINDOW_WIDTH // 2
+    center_y = WINDOW_HEIGHT // 2
+    crosshair_size = 10
+    
+    glColor3f(1.0, 1.0, 1.0)  # White crosshair
+    glBegin(GL_LINES)
+    # Horizontal line
+    glVertex2f(center_x - crosshair_size, center_y)
+    glVertex2f(center_x + crosshair_size, center_y)
+    # Vertical line
+    glVertex2f(center_x, center_y - crosshair_size)
+    glVertex2f(center_x, center_y + crosshair_size)
+    glEnd()
+    
+def hud_lines():
+    """Every HUD string as (x, y, text), formatted from the current game state"""
+    lines = []
+    
     # Game stats with better formatting
-    draw_text(20, WINDOW_HEIGHT - 60, f"Health: {int(player_health)}/{player_max_health}")
-    draw_text(20, WINDOW_HEIGHT - 80, f"Pokeballs: {pokeball_count}")
-    draw_text(20, WINDOW_HEIGHT - 100, f"Level: {experience_points // 100 + 1}")
-    draw_text(20, WINDOW_HEIGHT - 120, f"EXP: {experience_points}")
-    draw_text(20, WINDOW_HEIGHT - 140, f"Coins: {shop_currency}")
-    draw_text(20, WINDOW_HEIGHT - 160, f"Opponent Health: {opponent_health}/{opponent_max_health}")
-    draw_text(20, WINDOW_HEIGHT - 180, f"Ultra Balls: {ultra_balls} (Press X to use)")
+    lines.append((20, WINDOW_HEIGHT - 60, f"Health: {int(player_health)}/{player_max_health}"))
+    lines.append((20, WINDOW_HEIGHT - 80, f"Pokeballs: {pokeball_count}"))
+    lines.append((20, WINDOW_HEIGHT - 100, f"Level: {experience_points // 100 + 1}"))
+    lines.append((20, WINDOW_HEIGHT - 120, f"EXP: {experience_points}"))
+    lines.append((20, WINDOW_HEIGHT - 140, f"Coins: {shop_currency}"))
+    if hud.opponent is not None:
+        health, count = hud.opponent
+        crowd = f" (nearest of {count})" if count > 1 else ""
+        lines.append((20, WINDOW_HEIGHT - 160, f"Opponent Health: {health}/{opponent_max_health}{crowd}"))
+    lines.append((20, WINDOW_HEIGHT - 180, f"Ultra Balls: {ultra_balls} (Press X to use)"))
     
     # Pokemon count with type breakdown
-    visible_pokemon = [p for p in pokemon_list if len(p) >= 7 and not p[6]]
-    draw_text(20, WINDOW_HEIGHT - 180, f"Pokemon nearby: {len(visible_pokemon)}")
-    draw_text(20, WINDOW_HEIGHT - 200, f"Total caught: {total_caught}")
+    lines.append((20, WINDOW_HEIGHT - 200, f"Pokemon nearby: {hud.wild_count}"))
+    lines.append((20, WINDOW_HEIGHT - 220, f"Total caught: {total_caught}"))
     
-    # Current pokeball type with color coding
+    # Current pokeball type
     ball_name = pokeball_types[current_pokeball_type][0]
-    ball_color = pokeball_types[current_pokeball_type]
-    glColor3f(ball_color[1], ball_color[2], ball_color[3])  # Set color to pokeball color
-    draw_text(20, WINDOW_HEIGHT - 220, f"Current: {ball_name}")
-    glColor3f(1.0, 1.0, 1.0)  # Reset to white
+    lines.append((20, WINDOW_HEIGHT - 240, f"Current: {ball_name}"))
     
     # Camera mode with better positioning
     mode_text = "1st Person" if is_first_person else "3rd Person"
-    draw_text(WINDOW_WIDTH - 200, WINDOW_HEIGHT - 30, f"Camera: {mode_text}")
+    lines.append((WINDOW_WIDTH - 200, WINDOW_HEIGHT - 30, f"Camera: {mode_text}"))
     
     # Mouse control status
     mouse_text = "Enabled" if mouse_capture_enabled else "Disabled"
-    draw_text(WINDOW_WIDTH - 200, WINDOW_HEIGHT - 50, f"Mouse: {mouse_text}")
+    lines.append((WINDOW_WIDTH - 200, WINDOW_HEIGHT - 50, f"Mouse: {mouse_text}"))
     
     # Show nearest Pokemon info
-    nearest_pos = get_nearest_pokemon()
-    if nearest_pos:
-        distance = math.sqrt((nearest_pos[0] - player_pos[0])**2 + (nearest_pos[1] - player_pos[1])**2)
-        draw_text(WINDOW_WIDTH - 200, WINDOW_HEIGHT - 80, f"Nearest Pokemon: {int(distance)} units away")
+    if hud.nearest_distance is not None:
+        lines.append((WINDOW_WIDTH - 200, WINDOW_HEIGHT - 80, f"Nearest Pokemon: {int(hud.nearest_distance)} units away"))
     
     # Show Pokemon type distribution
-    type_counts = {}
-    for pokemon in visible_pokemon:
-        if len(pokemon) >= 4:
-            ptype = pokemon[3]
-            if ptype < len(pokemon_types):
-                pokemon_name = pokemon_types[ptype][0]
-                type_counts[pokemon_name] = type_counts.get(pokemon_name, 0) + 1
-    
-    if type_counts:
-        y_offset = WINDOW_HEIGHT - 220
-        draw_text(20, y_offset, "Pokemon Types:")
-        for pokemon_name, count in list(type_counts.items())[:3]:  # Show top 3
+    if hud.type_counts:
+        y_offset = WINDOW_HEIGHT - 260
+        lines.append((20, y_offset, "Pokemon Types:"))
+        for pokemon_name in hud.types_in_order()[:3]:  # Show top 3
             y_offset -= 20
-            draw_text(40, y_offset, f"{pokemon_name}: {count}")
-
-    # Show last combat event message (lower-center) with drop shadow and bright color
+            lines.append((40, y_offset, f"{pokemon_name}: {hud.type_counts[pokemon_name]}"))
+    
+    # Show last combat event message (lower-center) with drop shadow
     if last_event_timer > 0 and last_event_message:
         x = int(WINDOW_WIDTH * 0.5) - 250
         y = int(WINDOW_HEIGHT * 0.5) + 160
-        
-        # Shadow for retro style
-        glColor3f(0.0, 0.0, 0.0)
-        draw_text(x + 1, y - 1, last_event_message)
-        
-        # Main message - bright neon green for combat events
-        glColor3f(0.0, 1.0, 0.0)
-        draw_text(x, y, last_event_message)
-    
-    # Crosshair in center of screen
-    center_x = WINDOW_WIDTH // 2
-    center_y = WINDOW_HEIGHT // 2
-    crosshair_size = 10
-    
-    glColor3f(1.0, 1.0, 1.0)  # White crosshair
-    glBegin(GL_LINES)
-    # Horizontal line
-    glVertex2f(center_x - crosshair_size, center_y)
-    glVertex2f(center_x + crosshair_size, center_y)
-    # Vertical line
-    glVertex2f(center_x, center_y - crosshair_size)
-    glVertex2f(center_x, center_y + crosshair_size)
-    glEnd()
+        lines.append((x + 1, y - 1, last_event_message))
+        lines.append((x, y, last_event_message))
     
     # Controls
-    draw_text(20, 100, "Controls: WASD - Move, Arrow Keys - Camera, C - Switch Camera")
-    draw_text(20, 80, "Space - Jump, Left Click - Throw Rock, Right Click - Throw Pokeball")
-    draw_text(20, 60, "R - Reset, M - Toggle Mouse, H - Heal, J - Damage, 1-4 - Select Pokeball")
-    draw_text(20, 40, "X - Ultra Ball (instant opponent defeat), Catch 5 Pokemon to earn 1 Ultra Ball!")
+    lines.append((20, 100, "Controls: WASD - Move, Arrow Keys - Camera, C - Switch Camera"))
+    lines.append((20, 80, "Space - Jump, Left Click - Throw Rock, Right Click - Throw Pokeball"))
+    lines.append((20, 60, "R - Reset, M - Toggle Mouse, H - Heal, J - Damage, 1-4 - Select Pokeball, P - Profiler"))
+    lines.append((20, 40, "X - Ultra Ball (instant opponent defeat), Catch 5 Pokemon to earn 1 Ultra Ball!"))
+    return lines
+
+def rebuild_hud_text():
+    """Re-format the HUD strings into cached text vertices"""
+    hud.text = []
+    for x, y, text in hud_lines():
+        hud.text.extend(text_vertices(x, y, text))
+    hud.dirty = False
+
+def refresh_hud_nearest():
+    """Re-measure the nearest pokemon once the player has moved far enough"""
+    x, y = player_pos[0], player_pos[1]
+    if hud.nearest_from is not None:
+        dx = x - hud.nearest_from[0]
+        dy = y - hud.nearest_from[1]
+        if dx * dx + dy * dy < HUD_NEAREST_STEP * HUD_NEAREST_STEP:
+            return
+    
+    nearest_pos = get_nearest_pokemon()
+    distance = None
+    if nearest_pos:
+        distance = math.sqrt((nearest_pos[0] - x)**2 + (nearest_pos[1] - y)**2)
+    hud.nearest_from = (x, y)
+    if distance is None or hud.nearest_distance is None or int(distance) != int(hud.nearest_distance):
+        hud.dirty = True
+    hud.nearest_distance = distance
+
+def refresh_hud_opponent():
+    """Follow the nearest trainer's health, which changes as trainers move and get hit"""
+    nearest = opponents.nearest(player_pos[0], player_pos[1])
+    shown = (int(opponents.health[nearest]), opponents.count) if nearest >= 0 else None
+    if shown != hud.opponent:
+        hud.opponent = shown
+        hud.dirty = True
+
+def show_event_message(message, seconds):
+    """Show a combat/capture notification on the HUD for a few seconds"""
+    global last_event_message, last_event_timer
+    last_event_message = message
+    last_event_timer = seconds
+    hud.mark_dirty()
+
+def spawn_spacing_ok(x, y):
+    """True if no uncaught pokemon is within SPAWN_MIN_DISTANCE of (x, y)"""
+    limit = SPAWN_MIN_DISTANCE * SPAWN_MIN_DISTANCE
+    for handle in pokemon_grid.query(x, y, SPAWN_MIN_DISTANCE):
+        j = pokemon_store.row_of(handle)
+        dx = pokemon_store.x[j] - x
+        dy = pokemon_store.y[j] - y
+        if dx * dx + dy * dy < limit:
+            return False
+    return True
 
 def spawn_pokemon():
     """Spawn a new pokemon at random location with surrounding bushes, ensuring proper spacing"""
-    if len(pokemon_list) >= max_pokemon:
+    if pokemon_store.count >= max_pokemon:
         return
     
-    # Minimum distance between Pokemon
-    min_distance = 80  # Minimum spacing between Pokemon
-    max_attempts = 20  # Maximum attempts to find a valid position
-    
-    for attempt in range(max_attempts):
-        # Random position around player
-        angle = random.uniform(0, 2 * math.pi)
-        distance = random.uniform(100, 300)
-        x = player_pos[0] + distance * math.cos(angle)
-        y = player_pos[1] + distance * math.sin(angle)
-        z = 0  # Ground level (will be adjusted in drawing)
-        
-        # Check distance to existing Pokemon
-        valid_position = True
-        for existing_pokemon in pokemon_list:
-            if len(existing_pokemon) < 7 or existing_pokemon[6]:  # Skip if caught
-                continue
-            
-            # Calculate distance using math functions from context file
-            dx = x - existing_pokemon[0]
-            dy = y - existing_pokemon[1]
-            distance_to_existing = math.sqrt(dx * dx + dy * dy)
-            
-            if distance_to_existing < min_distance:
-                valid_position = False
-                break
-        
-        if valid_position:
-            # Random pokemon type
-            ptype = random.randint(0, len(pokemon_types) - 1)
-            pdata = pokemon_types[ptype]
-            
-            # Create pokemon: [x, y, z, type, health, max_health, caught, being_caught, direction, move_timer]
-            pokemon = [x, y, z, ptype, pdata[7], pdata[7], False, False, random.uniform(0, 360), 0]
-            pokemon_index = len(pokemon_list)
-            pokemon_list.append(pokemon)
-            
-            # Create bush around the pokemon: [x, y, z, radius, pokemon_index]
-            bush_radius = 40  # Large bush radius
-            bush = [x, y, z, bush_radius, pokemon_index]
-            bush_list.append(bush)
-            
-            print(f"A wild {pdata[0]} appeared in the bushes!")
+    # Candidate positions around the player; the broadphase grid makes each spacing check O(1)
+    angles = game_rng.uniform(0, 2 * math.pi, SPAWN_ATTEMPTS)
+    distances = game_rng.uniform(100, 300, SPAWN_ATTEMPTS)
+    xs = player_pos[0] + distances * np.cos(angles)
+    ys = player_pos[1] + distances * np.sin(angles)
+    
+    for x, y in zip(xs.tolist(), ys.tolist()):
+        if in_active_world(x, y) and spawn_spacing_ok(x, y):
+            add_wild_pokemon(x, y, 0)  # Ground level (will be adjusted in drawing)
             return
+    # The area around the player is full: skip this spawn rather than clump
+
+def poisson_disk_points(grid, limit=None):
+    """Poisson-disk points at least grid.min_distance apart, up to limit of them (default: fill the rectangle).
+    
+    Starts by dart throwing: batches of uniform candidates over the whole
+    rectangle, so a partial fill is spread evenly. Once darts rarely land it
+    switches to Bridson's algorithm, expanding up to SPAWN_BATCH active points
+    per pass so the spacing checks run as one array operation. Both stop as
+    soon as limit points are placed, so the cost follows the count rather
+    than the area. A batch's picks are also checked against each other. The
+    grid may already hold points, which the new ones keep clear of. Returns
+    (xs, ys) arrays of the new points only.
+    """
+    radius = grid.min_distance
+    spacing = radius * radius
+    first = grid.count
+    limit = sys.maxsize if limit is None else limit
+    active = []
+    
+    def place(xs, ys, rows):
+        """Add the candidates at rows that keep clear of each other; return which rows were placed"""
+        placed = []
+        for row in rows:
+            if grid.count - first >= limit:
+                break
+            x, y = xs[row], ys[row]
+            if all((x - xs[other]) ** 2 + (y - ys[other]) ** 2 >= spacing for other in placed):
+                placed.append(row)
+                grid.add(x, y)
+                active.append(grid.count - 1)
+        return placed
+    
+    # Dart throwing while at least one candidate in SPAWN_ATTEMPTS still fits
+    while grid.count - first < limit:
+        xs = game_rng.uniform(grid.x0, grid.x1, SPAWN_BATCH)
+        ys = game_rng.uniform(grid.y0, grid.y1, SPAWN_BATCH)
+        placed = place(xs.tolist(), ys.tolist(), np.flatnonzero(grid.fits(xs, ys)).tolist())
+        if len(placed) * SPAWN_ATTEMPTS < SPAWN_BATCH:
+            break
     
-    # If no valid position found after max attempts, spawn anyway but with warning
-    print("Warning: Could not find optimal spacing for new Pokemon")
-    angle = random.uniform(0, 2 * math.pi)
-    distance = random.uniform(100, 300)
-    x = player_pos[0] + distance * math.cos(angle)
-    y = player_pos[1] + distance * math.sin(angle)
-    z = 0
+    while active and grid.count - first < limit:
+        picks = game_rng.choice(len(active), min(SPAWN_BATCH, len(active)), replace=False)
+        centers = np.array([active[i] for i in picks.tolist()])
+        # Candidates in the annulus [r, 2r) around each picked active point
+        angles = game_rng.uniform(0, 2 * math.pi, (len(picks), SPAWN_ATTEMPTS))
+        distances = radius * np.sqrt(game_rng.uniform(1, 4, (len(picks), SPAWN_ATTEMPTS)))
+        xs = grid.x[centers][:, None] + distances * np.cos(angles)
+        ys = grid.y[centers][:, None] + distances * np.sin(angles)
+        ok = grid.fits(xs.ravel(), ys.ravel()).reshape(xs.shape)
+        
+        # First fitting candidate per active point, unless an earlier pick in the batch is too close
+        found = ok.any(axis=1)
+        column = ok.argmax(axis=1)
+        rows = np.arange(len(picks))
+        place(xs[rows, column].tolist(), ys[rows, column].tolist(), np.flatnonzero(found).tolist())
+        
+        # Points with no room left around them are done
+        retired = set(picks[~found].tolist())
+        if retired:
+            active = [point for i, point in enumerate(active) if i not in retired]
     
-    ptype = random.randint(0, len(pokemon_types) - 1)
+    return grid.x[first:grid.count].copy(), grid.y[first:grid.count].copy()
+
+def spawn_many(n, x0=None, y0=None, x1=None, y1=None, min_distance=SPAWN_MIN_DISTANCE):
+    """Spawn up to n pokemon spread over a rectangle (default: the active chunks) in one pass.
+    
+    Poisson-disk samples n points around the uncaught pokemon already there,
+    so every pokemon is at least min_distance from the others. Returns how
+    many spawned (fewer than n when the region is full). Ignores max_pokemon.
+    """
+    region = active_region()
+    x0 = region[0] if x0 is None else x0
+    y0 = region[1] if y0 is None else y0
+    x1 = region[2] if x1 is None else x1
+    y1 = region[3] if y1 is None else y1
+    
+    # Existing pokemon near the region keep their spacing too
+    grid = PoissonDiskGrid(min_distance, x0, y0, x1, y1)
+    m = pokemon_store.count
+    x = pokemon_store.x[:m]
+    y = pokemon_store.y[:m]
+    margin = min_distance
+    near = (~pokemon_store.caught[:m] & (x >= x0 - margin) & (x <= x1 + margin)
+            & (y >= y0 - margin) & (y <= y1 + margin))
+    for px, py in zip(x[near].tolist(), y[near].tolist()):
+        grid.add(px, py)
+    
+    xs, ys = poisson_disk_points(grid, n)
+    for px, py in zip(xs.tolist(), ys.tolist()):
+        add_wild_pokemon(px, py, 0, announce=False)
+    event_log.info(f"{len(xs)} wild Pokemon appeared in the bushes!")
+    return len(xs)
+
+def add_wild_pokemon(x, y, z, announce=True):
+    """Add a random pokemon and its bush at the given position"""
+    # Random pokemon type
+    ptype = int(game_rng.integers(len(pokemon_types)))
     pdata = pokemon_types[ptype]
-    pokemon = [x, y, z, ptype, pdata[7], pdata[7], False, False, random.uniform(0, 360), 0]
-    pokemon_index = len(pokemon_list)
-    pokemon_list.append(pokemon)
     
-    bush_radius = 40
-    bush = [x, y, z, bush_radius, pokemon_index]
-    bush_list.append(bush)
+    pokemon_index = pokemon_store.add(x, y, z, ptype, pdata[7], game_rng.uniform(0, 360))
+    handle = int(pokemon_store.handle[pokemon_index])
+    pokemon_grid.insert(handle, x, y)
+    hud.pokemon_added(ptype)
+    
+    # Create bush around the pokemon, linked both ways by handle
+    bush_radius = 40  # Large bush radius
+    pokemon_store.bush[pokemon_index] = add_bush(x, y, z, bush_radius, handle)
+    
+    if announce:
+        event_log.info(f"A wild {pdata[0]} appeared in the bushes!")
+
+def in_active_world(x, y):
+    """True if (x, y) is inside the world and in an active chunk"""
+    edge = GRID_LENGTH - 50
+    return -edge <= x <= edge and -edge <= y <= edge and world_chunks.key_of(x, y) in world_chunks.active
+
+def active_region():
+    """Rectangle of the chunks activated around the player, clipped to the world"""
+    cx, cy = world_chunks.key_of(player_pos[0], player_pos[1])
+    reach = ACTIVE_CHUNK_RADIUS
+    x0, y0, _, _ = world_chunks.bounds((cx - reach, cy - reach))
+    _, _, x1, y1 = world_chunks.bounds((cx + reach, cy + reach))
+    edge = GRID_LENGTH - 50
+    return max(x0, -edge), max(y0, -edge), min(x1, edge), min(y1, edge)
+
+def freeze_inactive_pokemon():
+    """Move every pokemon outside the active chunks (and its bush) into its chunk's frozen record.
+    
+    Caught pokemon have nothing left to simulate and are dropped.
+    """
+    store = pokemon_store
+    n = store.count
+    if n == 0:
+        return
+    size = world_chunks.chunk_size
+    keys = list(zip(np.floor(store.x[:n] / size).astype(np.int64).tolist(),
+                    np.floor(store.y[:n] / size).astype(np.int64).tolist()))
+    leaving = [j for j in range(n) if keys[j] not in world_chunks.active]
+    if not leaving:
+        return
+    
+    # One record array per chunk, appended to anything already frozen there
+    by_chunk = {}
+    for j in leaving:
+        if not store.caught[j]:
+            by_chunk.setdefault(keys[j], []).append(j)
+    for key, rows in by_chunk.items():
+        records = np.zeros(len(rows), dtype=CHUNK_RECORD)
+        for name in ("x", "y", "z", "ptype", "health", "max_health", "direction", "move_timer"):
+            records[name] = getattr(store, name)[rows]
+        for record, j in zip(records, rows):
+            bush = get_bush(int(store.bush[j]))
+            if bush is not None:
+                record["bush_x"], record["bush_y"], record["bush_z"], record["bush_radius"] = bush[:4]
+        previous = world_chunks.thaw(key)
+        if previous is not None:
+            records = np.concatenate([np.frombuffer(previous, dtype=CHUNK_RECORD), records])
+        world_chunks.freeze(key, records.tobytes())
+    
+    # Highest rows first so the swap-removes don't move rows still to be removed
+    for j in reversed(leaving):
+        if not store.caught[j]:
+            pokemon_grid.remove(int(store.handle[j]))
+            hud.pokemon_removed(store.ptype[j])
+        remove_bush_for_pokemon(j)
+        store.remove(j)
+
+def restore_chunk(key):
+    """Bring a frozen chunk's pokemon and bushes back to life, up to max_pokemon.
     
-    print(f"A wild {pdata[0]} appeared in the bushes!")
+    Pokemon beyond the cap stay frozen until the chunk is activated again.
+    """
+    data = world_chunks.thaw(key)
+    if data is None:
+        return
+    records = np.frombuffer(data, dtype=CHUNK_RECORD)
+    room = max(0, max_pokemon - pokemon_store.count)
+    if len(records) > room:
+        world_chunks.freeze(key, records[room:].tobytes())
+        records = records[:room]
+    for record in records.tolist():
+        x, y, z, ptype, health, max_health, direction, move_timer, bush_x, bush_y, bush_z, bush_radius = record
+        pokemon_index = pokemon_store.add(x, y, z, ptype, max_health, direction)
+        pokemon_store.health[pokemon_index] = health
+        pokemon_store.move_timer[pokemon_index] = move_timer
+        handle = int(pokemon_store.handle[pokemon_index])
+        pokemon_grid.insert(handle, x, y)
+        hud.pokemon_added(ptype)
+        if bush_radius > 0:
+            pokemon_store.bush[pokemon_index] = add_bush(bush_x, bush_y, bush_z, bush_radius, handle)
+
+def update_chunks():
+    """Stream the world around the player: freeze chunks left behind, restore the ones entered"""
+    leaving, entering = world_chunks.recenter(player_pos[0], player_pos[1])
+    if not leaving and not entering:
+        return  # Same chunk as last tick
+    freeze_inactive_pokemon()
+    for key in entering:
+        restore_chunk(key)
+
+def pokemon_ai_rows(x, y, move_timer, ptype, caught, noise, dt, low, high):
+    """Pokemon AI for a run of store rows, in place; returns the moved rows (relative to the run).
+    
+    noise holds three uniform [0, 1) numbers per row: the jitter roll and
+    the x and y offsets. Runs in-process or in a PokemonAIPool worker.
+    """
+    live = ~caught  # Caught Pokemon don't move
+    
+    # Update animation timer
+    move_timer[live] += dt
+    
+    # Some Pokemon have special behaviors: a per-species chance each tick
+    # to jitter by up to a per-species offset (see pokemon_jitter)
+    rows = np.flatnonzero(live & (noise[:, 0] < pokemon_jitter_chance[ptype]))
+    if len(rows) == 0:
+        return rows
+    reach = pokemon_jitter_range[ptype[rows]]
+    # Keep Pokemon within reasonable bounds (only a jitter can take them out)
+    new_x = np.clip(x[rows] + (2.0 * noise[rows, 1] - 1.0) * reach, low, high)
+    new_y = np.clip(y[rows] + (2.0 * noise[rows, 2] - 1.0) * reach, low, high)
+    moved = (new_x != x[rows]) | (new_y != y[rows])
+    x[rows] = new_x
+    y[rows] = new_y
+    return rows[moved]
+
+def release_shared(block):
+    """Unlink a shared-memory block we created and close it once nothing maps it"""
+    block.unlink()
+    with contextlib.suppress(BufferError):  # Still viewed by an array: closed when that goes
+        block.close()
+
+worker_blocks = {}  # Shared-memory blocks a PokemonAIPool worker has mapped, by name
+
+def attach_shared(name, shape, dtype):
+    """Array over a shared-memory block created by the main process (cached per worker)"""
+    block = worker_blocks.get(name)
+    if block is None:
+        block = shared_memory.SharedMemory(name=name)
+        worker_blocks[name] = block
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+def pokemon_ai_task(task):
+    """PokemonAIPool worker entry point: run the AI over rows [start, stop) of the shared columns"""
+    names, capacity, start, stop, dt, low, high = task
+    # Blocks the store has since outgrown
+    for name in [name for name in worker_blocks if name not in names.values()]:
+        with contextlib.suppress(BufferError):
+            worker_blocks.pop(name).close()
+    
+    dtypes = dict(PokemonStore.FIELDS)
+    columns = [attach_shared(names[name], capacity, dtypes[name])[start:stop] for name in PokemonStore.SHARED_FIELDS]
+    x, y, ptype, caught, move_timer = columns
+    noise = attach_shared(names["noise"], (capacity, 3), np.float64)[start:stop]
+    return pokemon_ai_rows(x, y, move_timer, ptype, caught, noise, dt, low, high) + start
+
+def start_pokemon_ai(workers):
+    """A PokemonAIPool of this many workers, or None to run the AI in-process.
+    
+    The pool is opt-in: with a single CPU the workers could only take turns
+    with the game, so the request is ignored.
+    """
+    if workers <= 0:
+        return None
+    if (os.cpu_count() or 1) < 2:
+        print(f"Ignoring --ai-workers {workers}: only one CPU is available")
+        return None
+    return PokemonAIPool(pokemon_store, workers)
 
 def update_pokemon(dt):
-    """Update pokemon AI with basic behaviors"""
-    for i in range(len(pokemon_list)):
-        if i >= len(pokemon_list):
-            break
-        pokemon = pokemon_list[i]
-        if len(pokemon) < 10 or pokemon[6]:  # Skip if caught
+    """Update pokemon AI with basic behaviors (batched over all pokemon, in worker processes when enabled)"""
+    store = pokemon_store
+    n = store.count
+    if n == 0:
+        return
+    
+    # Every random number comes from the one game stream, whichever backend runs
+    low, high = -GRID_LENGTH + 50, GRID_LENGTH - 50
+    if pokemon_ai is not None:
+        game_rng.random(out=pokemon_ai.noise_rows(n))
+        moved = pokemon_ai.run(n, dt, low, high)
+    else:
+        noise = game_rng.random((n, 3))
+        moved = pokemon_ai_rows(store.x[:n], store.y[:n], store.move_timer[:n], store.ptype[:n],
+                                store.caught[:n], noise, dt, low, high)
+    
+    # Keep the broadphase grid in sync for the few that actually moved
+    handles = store.handle
+    x = store.x
+    y = store.y
+    for i in moved.tolist():
+        pokemon_grid.move(int(handles[i]), x[i], y[i])
+
+def sweep_projectile(projectile, dt):
+    """This tick's straight-line motion of a projectile, cut short at the ground.
+    
+    Returns (sx, sy, sz, dx, dy, dz, grounded): the segment runs from s to s + d
+    and grounded is True when it ends on the ground (z = 5).
+    """
+    sx, sy, sz = projectile[0], projectile[1], projectile[2]
+    dx, dy, dz = projectile[3] * dt, projectile[4] * dt, projectile[5] * dt
+    
+    grounded = sz + dz <= 5
+    if grounded:
+        # Fraction of the step at which it reaches z = 5 (0 if already there)
+        t = (5 - sz) / dz if sz > 5 else 0.0
+        dx, dy, dz = dx * t, dy * t, dz * t
+    return sx, sy, sz, dx, dy, dz, grounded
+
+def advance_projectile(projectile, sweep, t):
+    """Move a projectile to fraction t of its sweep; it stops if it ran into the ground"""
+    sx, sy, sz, dx, dy, dz, grounded = sweep
+    projectile[0] = sx + dx * t
+    projectile[1] = sy + dy * t
+    projectile[2] = sz + dz * t
+    if grounded and t >= 1.0:
+        projectile[2] = 5
+        projectile[6] = False
+
+def segment_sphere_toi(sweep, center, radius):
+    """Earliest fraction t in [0, 1] of the sweep that is inside the sphere, or None"""
+    sx, sy, sz, dx, dy, dz, _ = sweep
+    fx = sx - center[0]
+    fy = sy - center[1]
+    fz = sz - center[2]
+    c = fx * fx + fy * fy + fz * fz - radius * radius
+    if c < 0:
+        return 0.0  # Already inside at the start of the tick
+    b = fx * dx + fy * dy + fz * dz
+    if b >= 0:
+        return None  # Moving away (or not moving)
+    a = dx * dx + dy * dy + dz * dz
+    disc = b * b - a * c
+    if disc < 0:
+        return None
+    t = (-b - math.sqrt(disc)) / a
+    return t if t <= 1.0 else None
+
+def segment_spheres_toi(sx, sy, sz, dx, dy, dz, cx, cy, cz, radius):
+    """segment_sphere_toi() broadcast over arrays of segments and/or spheres (np.inf for a miss)"""
+    fx = sx - cx
+    fy = sy - cy
+    fz = sz - cz
+    c = fx * fx + fy * fy + fz * fz - radius * radius
+    b = fx * dx + fy * dy + fz * dz
+    a = dx * dx + dy * dy + dz * dz
+    disc = b * b - a * c
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (-b - np.sqrt(np.maximum(disc, 0.0))) / a
+    t = np.where((b < 0) & (disc >= 0) & (t <= 1.0), t, np.inf)
+    return np.where(c < 0, 0.0, t)  # Already inside at the start of the tick
+
+def sweep_projectiles(pool, dt):
+    """sweep_projectile() for every slot in flight at once.
+    
+    Returns arrays (sx, sy, sz, dx, dy, dz, grounded, active), one entry per
+    slot in pool order.
+    """
+    slots = pool.slots[:len(pool)]
+    columns = np.array([slot[:7] for slot in slots], dtype=np.float64).reshape(-1, 7)
+    sx, sy, sz, vx, vy, vz, active = columns.T
+    dx, dy, dz = vx * dt, vy * dt, vz * dt
+    
+    grounded = sz + dz <= 5
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_ground = np.where(sz > 5, (5 - sz) / dz, 0.0)
+    shorten = np.where(grounded, t_ground, 1.0)
+    return sx, sy, sz, dx * shorten, dy * shorten, dz * shorten, grounded, active != 0
+
+def first_opponent_hits(sweeps, radius):
+    """Earliest opponent each sweep enters (a sphere of radius) as arrays (index, t); -1 and np.inf for a miss"""
+    store = opponents
+    n = len(sweeps[0])
+    if store.count == 0 or n == 0:
+        return np.full(n, -1), np.full(n, np.inf)
+    sx, sy, sz, dx, dy, dz = (column[:, None] for column in sweeps[:6])
+    t = segment_spheres_toi(sx, sy, sz, dx, dy, dz, store.x, store.y, store.z, radius)  # Sweeps x opponents
+    best = np.argmin(t, axis=1)  # Ties go to the lower index
+    t_best = t[np.arange(n), best]
+    return np.where(t_best != np.inf, best, -1), t_best
+
+def first_pokemon_hit(sweep, extra_radius):
+    """Earliest uncaught pokemon the sweep enters (size + extra_radius) as (index, t), or (-1, None)"""
+    store = pokemon_store
+    sx, sy, _, dx, dy, _, _ = sweep
+    
+    # Broadphase: a circle around the swept segment's midpoint covers every reachable cell
+    half_length = 0.5 * math.sqrt(dx * dx + dy * dy)
+    reach = half_length + max_pokemon_size + extra_radius
+    candidates = pokemon_grid.query(sx + 0.5 * dx, sy + 0.5 * dy, reach)
+    
+    best, best_t = -1, None
+    for handle in candidates:
+        j = store.row_of(handle)
+        radius = pokemon_type_size[store.ptype[j]] + extra_radius
+        t = segment_sphere_toi(sweep, (store.x[j], store.y[j], store.z[j]), radius)
+        if t is None:
             continue
-        
-        # Update animation timer
-        pokemon[9] += dt
-        
-        # Basic Pokemon behaviors
-        pdata = pokemon_types[pokemon[3]]
-        pokemon_name = pdata[0]
-        
-        # Some Pokemon have special behaviors
-        if pokemon_name == "Snorlax":
-            # Snorlax occasionally "sleeps" (moves very slowly)
-            if random.random() < 0.01:  # 1% chance per frame
-                pokemon[0] += random.uniform(-2, 2)
-                pokemon[1] += random.uniform(-2, 2)
-        elif pokemon_name == "Gengar":
-            # Gengar occasionally "teleports" (moves randomly)
-            if random.random() < 0.005:  # 0.5% chance per frame
-                pokemon[0] += random.uniform(-10, 10)
-                pokemon[1] += random.uniform(-10, 10)
-        elif pokemon_name in ["Pikachu", "Eevee"]:
-            # Small Pokemon occasionally hop around
-            if random.random() < 0.02:  # 2% chance per frame
-                pokemon[0] += random.uniform(-5, 5)
-                pokemon[1] += random.uniform(-5, 5)
-        
-        # Keep Pokemon within reasonable bounds
-        pokemon[0] = max(-GRID_LENGTH + 50, min(GRID_LENGTH - 50, pokemon[0]))
-        pokemon[1] = max(-GRID_LENGTH + 50, min(GRID_LENGTH - 50, pokemon[1]))
+        # Ties go to the lower row so the result doesn't depend on grid order
+        if best_t is None or t < best_t or (t == best_t and j < best):
+            best, best_t = j, t
+    return best, best_t
+
+def throw_origin():
+    """Where throws start: the eye in 1st person, the shoulder/hand in 3rd person"""
+    aim = update_aim_camera()
+    if is_first_person:
+        return aim.eye
+    cos_r, sin_r = aim.heading
+    forward, side, height = THROW_HAND_OFFSET
+    return (player_pos[0] + forward * cos_r - side * sin_r,
+            player_pos[1] + forward * sin_r + side * cos_r,
+            player_pos[2] + height)
 
 def throw_pokeball(target_x, target_y, target_z):
     """Throw a pokeball towards target with moderate speed in straight line"""
     global pokeball_count
     
     if pokeball_count <= 0:
-        print("No Pokeballs left!")
+        event_log.info("No Pokeballs left!")
         return
     
-    # Determine throw origin: from eye in 1st person, from player's right shoulder/hand in 3rd person
-    if is_first_person:
-        origin_x = player_pos[0]
-        origin_y = player_pos[1]
-        origin_z = player_pos[2] + 20
-    else:
-        # Right shoulder/hand position relative to player facing
-        shoulder_offset = 25
-        forward_offset = 10
-        hand_height = 20
-        origin_x = player_pos[0] + shoulder_offset * math.cos(math.radians(player_rotation + 90)) + forward_offset * math.cos(math.radians(player_rotation))
-        origin_y = player_pos[1] + shoulder_offset * math.sin(math.radians(player_rotation + 90)) + forward_offset * math.sin(math.radians(player_rotation))
-        origin_z = player_pos[2] + hand_height
+    origin_x, origin_y, origin_z = throw_origin()
     
     # Calculate direct velocity vector for straight-line trajectory from origin
     dx = target_x - origin_x
@@ -1147,27 +3094,18 @@ def throw_pokeball(target_x, target_y, target_z):
     origin_z += (0 if distance == 0 else (dz / distance) * nudge)
 
     # Create pokeball: [x, y, z, vx, vy, vz, active, target_x, target_y, target_z]
-    pokeball = [origin_x, origin_y, origin_z, vx, vy, vz, True, target_x, target_y, target_z]
-    pokeballs_thrown.append(pokeball)
+    pokeball = launch_projectile(pokeballs_thrown, origin_x, origin_y, origin_z, vx, vy, vz, target_x, target_y, target_z)
+    if pokeball is None:
+        event_log.info("Too many Pokeballs in flight!")
+        return
     pokeball_count -= 1
+    hud.mark_dirty()
     
-    print(f"Pokeball thrown! Remaining: {pokeball_count}")
+    event_log.info(f"Pokeball thrown! Remaining: {pokeball_count}")
 
 def throw_rock(target_x, target_y, target_z):
     """Throw a rock towards target with moderate speed in straight line"""
-    # Determine throw origin: from eye in 1st person, from player's right shoulder/hand in 3rd person
-    if is_first_person:
-        origin_x = player_pos[0]
-        origin_y = player_pos[1]
-        origin_z = player_pos[2] + 20
-    else:
-        # Right shoulder/hand position relative to player facing
-        shoulder_offset = 25
-        forward_offset = 10
-        hand_height = 20
-        origin_x = player_pos[0] + shoulder_offset * math.cos(math.radians(player_rotation + 90)) + forward_offset * math.cos(math.radians(player_rotation))
-        origin_y = player_pos[1] + shoulder_offset * math.sin(math.radians(player_rotation + 90)) + forward_offset * math.sin(math.radians(player_rotation))
-        origin_z = player_pos[2] + hand_height
+    origin_x, origin_y, origin_z = throw_origin()
     
     # Calculate direct velocity vector for straight-line trajectory from origin
     dx = target_x - origin_x
@@ -1192,196 +3130,208 @@ def throw_rock(target_x, target_y, target_z):
     origin_z += (0 if distance == 0 else (dz / distance) * nudge)
 
     # Create rock: [x, y, z, vx, vy, vz, active, target_x, target_y, target_z]
-    rock = [origin_x, origin_y, origin_z, vx, vy, vz, True, target_x, target_y, target_z]
-    rocks_thrown.append(rock)
+    rock = launch_projectile(rocks_thrown, origin_x, origin_y, origin_z, vx, vy, vz, target_x, target_y, target_z)
+    if rock is None:
+        event_log.info("Too many rocks in flight!")
+        return
     
-    print("Rock thrown!")
+    event_log.info("Rock thrown!")
+
+def launch_projectile(pool, x, y, z, vx, vy, vz, target_x=0.0, target_y=0.0, target_z=0.0):
+    """Take a slot from a projectile pool for a new throw (None if the pool is full)"""
+    projectile = pool.spawn(x, y, z, vx, vy, vz, target_x, target_y, target_z)
+    if projectile is not None:
+        # A reused slot must not be interpolated from its previous occupant
+        previous_positions.pop(id(projectile), None)
+    return projectile
 
 def update_pokeballs(dt):
     """Update pokeball physics with straight-line trajectory"""
-    global total_caught, experience_points, shop_currency, ultra_balls, opponent_health, last_event_message, last_event_timer, player_health
+    global total_caught, experience_points, shop_currency, ultra_balls, player_health
+    if len(pokeballs_thrown) == 0:
+        return
+    
+    # Sweep this tick's straight-line trajectory (no gravity) of every ball so
+    # fast balls can't pass through a target between ticks. Opponents stay put
+    # during the pass, so every ball is tested against them at once
+    sweeps = sweep_projectiles(pokeballs_thrown, dt)
+    opponent_hits, opponent_times = first_opponent_hits(sweeps, OPPONENT_HITBOX)
+    opponent_hits, opponent_times = opponent_hits.tolist(), opponent_times.tolist()
+    sweep_rows = list(zip(*(column.tolist() for column in sweeps[:7])))
     for i in range(len(pokeballs_thrown) - 1, -1, -1):
         pokeball = pokeballs_thrown[i]
         if not pokeball[6]:  # Not active
             continue
+        sweep = sweep_rows[i]
         
-        # Update position with straight-line trajectory (no gravity)
-        pokeball[0] += pokeball[3] * dt
-        pokeball[1] += pokeball[4] * dt
-        pokeball[2] += pokeball[5] * dt
+        # Check pokemon collision with improved detection
+        # (size + 8: larger collision radius for better hit detection)
+        j, t_hit = first_pokemon_hit(sweep, 8)
         
-        # Check ground collision
-        if pokeball[2] <= 5:
-            pokeball[2] = 5
-            pokeball[6] = False
+        # Check opponent collision (player can throw pokeballs at opponents);
+        # whichever target the ball reaches first takes the hit
+        k, t_opponent = opponent_hits[i], opponent_times[i]
+        hit_opponent = k >= 0 and (j < 0 or t_opponent < t_hit)
+        if hit_opponent:
+            j, t_hit = -1, t_opponent
         
-        # Check pokemon collision with improved detection
-        for j in range(len(pokemon_list)):
-            pokemon = pokemon_list[j]
-            if len(pokemon) < 7 or pokemon[6]:  # Skip if caught
-                continue
+        # Stop at the point of impact (or the end of the step / the ground)
+        advance_projectile(pokeball, sweep, 1.0 if t_hit is None else t_hit)
+        
+        if j >= 0:  # Hit!
+            # Immediate capture on hit
+            pokeball[6] = False
+            pokemon_store.caught[j] = True
+            pokemon_grid.remove(int(pokemon_store.handle[j]))
+            hud.pokemon_removed(pokemon_store.ptype[j])
+            remove_bush_for_pokemon(j)
+            total_caught += 1
+            experience_points += 10
+            shop_currency += 5
             
-            distance = math.sqrt(
-                (pokeball[0] - pokemon[0])**2 +
-                (pokeball[1] - pokemon[1])**2 +
-                (pokeball[2] - pokemon[2])**2
-            )
+            # Give ultra ball every 5 Pokémon caught
+            if total_caught % 5 == 0:
+                ultra_balls += 1
+                event_log.info(f"Ultra Ball earned! Total: {ultra_balls}")
             
-            pdata = pokemon_types[pokemon[3]]
-            collision_radius = pdata[4] + 8  # Larger collision radius for better hit detection
-            if distance < collision_radius:  # Hit!
-                # Immediate capture on hit
-                pokeball[6] = False
-                if not pokemon[6]:
-                    pokemon[6] = True
-                    try:
-                        remove_bush_for_pokemon(j)
-                    except Exception:
-                        pass
-                    total_caught += 1
-                    experience_points += 10
-                    shop_currency += 5
-                    
-                    # Give ultra ball every 5 Pokémon caught
-                    if total_caught % 5 == 0:
-                        ultra_balls += 1
-                        print(f"Ultra Ball earned! Total: {ultra_balls}")
-                    
-                    try:
-                        pname = pokemon_types[pokemon[3]][0]
-                    except Exception:
-                        pname = "Pokemon"
-                    print(f"Captured {pname}!")
-                break
-        
-        # Check opponent collision (player can throw pokeballs at opponent)
-        dx = pokeball[0] - opponent_pos[0]
-        dy = pokeball[1] - opponent_pos[1]
-        dz = pokeball[2] - opponent_pos[2]
-        opponent_distance = math.sqrt(dx*dx + dy*dy + dz*dz)
+            try:
+                pname = pokemon_types[pokemon_store.ptype[j]][0]
+            except Exception:
+                pname = "Pokemon"
+            event_log.info(f"Captured {pname}!")
         
-        if opponent_distance < 20:  # Opponent hitbox
+        if hit_opponent:
             pokeball[6] = False
             # Damage opponent and restore player health
-            damage = random.randint(15, 25)
-            opponent_health = max(0, opponent_health - damage)
+            damage = int(game_rng.integers(15, 26))
+            opponents.health[k] = max(0, opponents.health[k] - damage)
             
             # Check for victory
-            if opponent_health <= 0:
-                last_event_message = "VICTORY! You defeated the opponent!"
-                last_event_timer = 5.0
-                print("VICTORY! You defeated the opponent!")
+            if opponents.health[k] <= 0:
+                show_event_message("VICTORY! You defeated the opponent!", 5.0)
+                event_log.info("VICTORY! You defeated the opponent!")
                 # Reset opponent for rematch
-                opponent_health = opponent_max_health
-                opponent_pokeballs = 10
+                opponents.refill(k)
             else:
                 # Restore 20 health when hitting opponent
                 if player_health < player_max_health:
                     player_health = min(player_max_health, player_health + 20)
-                    last_event_message = f"Opponent hit for {damage} damage! You regained 20 health! Health: {player_health}/{player_max_health}"
+                    message = f"Opponent hit for {damage} damage! You regained 20 health! Health: {player_health}/{player_max_health}"
                 else:
-                    last_event_message = f"Opponent hit for {damage} damage! Health: {opponent_health}/{opponent_max_health}"
+                    message = f"Opponent hit for {damage} damage! Health: {opponents.health[k]}/{opponent_max_health}"
                 
-                last_event_timer = 2.5
-                print(f"You hit opponent for {damage} damage! Health: {player_health}/{player_max_health}")
+                show_event_message(message, 2.5)
+                event_log.info(f"You hit opponent for {damage} damage! Health: {player_health}/{player_max_health}")
         
         # Remove inactive pokeballs
         if not pokeball[6]:
             pokeballs_thrown.pop(i)
 
-def update_opponent(dt):
-    """Update opponent AI behavior"""
-    global opponent_pos, opponent_direction, opponent_move_timer, opponent_throw_cooldown, opponent_pokeballs, opponent_pokeballs_thrown
+def update_opponents(dt):
+    """Update every opponent's AI in one batched pass: wander, face the player, throw"""
+    store = opponents
+    if store.count == 0:
+        return
     
-    # Move around randomly
-    opponent_move_timer += dt
-    if opponent_move_timer > 3.0:  # Change direction every 3 seconds
-        opponent_direction = random.uniform(0, 360)
-        opponent_move_timer = 0.0
+    # Move around randomly: each picks a new heading every 3 seconds
+    store.move_timer += dt
+    turning = store.move_timer > 3.0
+    if turning.any():
+        store.direction[turning] = game_rng.uniform(0, 360, int(turning.sum()))
+        store.move_timer[turning] = 0.0
     
     # Move in current direction
-    move_speed = 15.0
-    opponent_pos[0] += math.cos(math.radians(opponent_direction)) * move_speed * dt
-    opponent_pos[1] += math.sin(math.radians(opponent_direction)) * move_speed * dt
-    
-    # Keep opponent within bounds
-    opponent_pos[0] = max(-GRID_LENGTH + 50, min(GRID_LENGTH - 50, opponent_pos[0]))
-    opponent_pos[1] = max(-GRID_LENGTH + 50, min(GRID_LENGTH - 50, opponent_pos[1]))
-    
-    # Face player
-    dx = player_pos[0] - opponent_pos[0]
-    dy = player_pos[1] - opponent_pos[1]
-    if dx != 0 or dy != 0:
-        opponent_direction = math.atan2(dy, dx) * 180.0 / math.pi
-    
-    # Throw pokeball at player if cooldown is ready
-    opponent_throw_cooldown -= dt
-    if opponent_throw_cooldown <= 0 and opponent_pokeballs > 0:
-        # Calculate direction to player
-        dx = player_pos[0] - opponent_pos[0]
-        dy = player_pos[1] - opponent_pos[1]
-        dz = player_pos[2] - opponent_pos[2]
-        distance = math.sqrt(dx*dx + dy*dy + dz*dz)
-        
-        if distance < 300:  # Only throw if player is within range
-            # Create opponent pokeball
-            speed = 200.0
-            vx = (dx / distance) * speed if distance > 0 else 0
-            vy = (dy / distance) * speed if distance > 0 else 0
-            vz = (dz / distance) * speed if distance > 0 else 0
-            
-            opponent_pokeball = [opponent_pos[0], opponent_pos[1], opponent_pos[2] + 20, vx, vy, vz, True]
-            opponent_pokeballs_thrown.append(opponent_pokeball)
-            opponent_pokeballs -= 1
-            opponent_throw_cooldown = 2.0  # 2 second cooldown
+    heading = np.radians(store.direction)
+    store.x += np.cos(heading) * OPPONENT_SPEED * dt
+    store.y += np.sin(heading) * OPPONENT_SPEED * dt
+    
+    # Keep opponents within bounds
+    low, high = -GRID_LENGTH + 50, GRID_LENGTH - 50
+    for column in (store.x, store.y):
+        np.minimum(np.maximum(column, low, out=column), high, out=column)
+    
+    # Face player (unless standing right on top of them)
+    dx = player_pos[0] - store.x
+    dy = player_pos[1] - store.y
+    dz = player_pos[2] - store.z
+    facing = (dx != 0) | (dy != 0)
+    np.degrees(np.arctan2(dy, dx), out=store.direction, where=facing)
+    
+    # Throw pokeball at player if cooldown is ready and player is within range
+    store.throw_cooldown -= dt
+    distance = np.sqrt(dx * dx + dy * dy + dz * dz)
+    ready = (store.throw_cooldown <= 0) & (store.pokeballs > 0) & (distance < OPPONENT_THROW_RANGE)
+    if not ready.any():
+        return
+    for i in np.flatnonzero(ready).tolist():
+        # Plain floats: NumPy scalars in a slot would slow every later update of it
+        x, y, z, ox, oy, oz, d = (float(v[i]) for v in (store.x, store.y, store.z, dx, dy, dz, distance))
+        scale = OPPONENT_THROW_SPEED / d if d > 0 else 0.0
+        pokeball = launch_projectile(opponent_pokeballs_thrown, x, y, z + 20,
+                                     ox * scale, oy * scale, oz * scale,
+                                     player_pos[0], player_pos[1], player_pos[2])
+        if pokeball is not None:
+            store.pokeballs[i] -= 1
+            store.throw_cooldown[i] = OPPONENT_THROW_COOLDOWN
 
 def update_opponent_pokeballs(dt):
-    """Update opponent pokeball physics and handle player damage"""
-    global opponent_pokeballs_thrown, player_health, last_event_message, last_event_timer
+    """Update every opponent pokeball (batched when there are many) and handle player damage"""
+    global player_health, game_over
+    pool = opponent_pokeballs_thrown
+    n = len(pool)
+    if n == 0:
+        return
     
-    for i in range(len(opponent_pokeballs_thrown) - 1, -1, -1):
-        pokeball = opponent_pokeballs_thrown[i]
-        if not pokeball[6]:  # Not active
-            continue
-        
-        # Update position
-        pokeball[0] += pokeball[3] * dt
-        pokeball[1] += pokeball[4] * dt
-        pokeball[2] += pokeball[5] * dt
-        
-        # Check ground collision
-        if pokeball[2] <= 5:
-            pokeball[6] = False
+    if n < OPPONENT_BATCH_MIN:
+        # A few balls: NumPy's per-call overhead would cost more than the loop
+        hits = 0
+        for ball in pool:
+            if not ball[6]:
+                continue
+            sweep = sweep_projectile(ball, dt)
+            t_hit = segment_sphere_toi(sweep, player_pos, 15)  # Player hitbox
+            advance_projectile(ball, sweep, 1.0 if t_hit is None else t_hit)
+            if t_hit is not None:
+                ball[6] = False
+                hits += 1
+    else:
+        # Sweep this tick's motion of every ball, ending early at the ground
+        slots = pool.slots[:n]
+        sx, sy, sz, dx, dy, dz, grounded, active = sweep_projectiles(pool, dt)
         
-        # Check player collision
-        dx = pokeball[0] - player_pos[0]
-        dy = pokeball[1] - player_pos[1]
-        dz = pokeball[2] - player_pos[2]
-        distance = math.sqrt(dx*dx + dy*dy + dz*dz)
+        # Check player collision along the whole step, all balls at once
+        t_hit = segment_spheres_toi(sx, sy, sz, dx, dy, dz, player_pos[0], player_pos[1], player_pos[2], 15)  # Player hitbox
+        hit = active & (t_hit != np.inf)
+        t = np.where(hit, t_hit, 1.0)
+        x, y, z = sx + dx * t, sy + dy * t, sz + dz * t
+        landed = active & grounded & ~hit
+        z[landed] = 5
+        active &= ~(hit | landed)
         
-        if distance < 15:  # Player hitbox
-            pokeball[6] = False
-            # Damage player (exactly 20 damage)
-            damage = 20
-            global player_health
-            player_health = max(0, player_health - damage)
-            last_event_message = f"You were hit by opponent for {damage} damage! Health: {player_health}/{player_max_health}"
-            last_event_timer = 2.5
-            print(f"Opponent hit you for {damage} damage! Health: {player_health}/{player_max_health}")
-            
-            # Check if player died
-            if player_health <= 0:
-                global game_over
-                game_over = True
-                last_event_message = "GAME OVER! You were defeated by the opponent!"
-                last_event_timer = 5.0
-                print("GAME OVER! You were defeated by the opponent!")
-                # Reset player health to prevent negative values
-                player_health = 0
+        for slot, px, py, pz, still_active in zip(slots, x.tolist(), y.tolist(), z.tolist(), active.tolist()):
+            slot[0], slot[1], slot[2] = px, py, pz
+            slot[6] = still_active
+        hits = int(hit.sum())
+    
+    # Damage player (exactly 20 damage) for each ball that reached them
+    for _ in range(hits):
+        damage = 20
+        player_health = max(0, player_health - damage)
+        show_event_message(f"You were hit by opponent for {damage} damage! Health: {player_health}/{player_max_health}", 2.5)
+        event_log.info(f"Opponent hit you for {damage} damage! Health: {player_health}/{player_max_health}")
         
-        # Remove inactive pokeballs
-        if not pokeball[6]:
-            opponent_pokeballs_thrown.pop(i)
+        # Check if player died
+        if player_health <= 0:
+            game_over = True
+            show_event_message("GAME OVER! You were defeated by the opponent!", 5.0)
+            event_log.info("GAME OVER! You were defeated by the opponent!")
+            # Reset player health to prevent negative values
+            player_health = 0
+    
+    # Remove inactive pokeballs (from the end, so popping keeps earlier indices valid)
+    for i in range(n - 1, -1, -1):
+        if not pool.slots[i][6]:
+            pool.pop(i)
 
 def update_rocks(dt):
     """Update rock physics and handle Pokemon damage"""
@@ -1390,90 +3340,94 @@ def update_rocks(dt):
         if not rock[6]:  # Not active
             continue
         
-        # Update position with straight-line trajectory (no gravity)
-        rock[0] += rock[3] * dt
-        rock[1] += rock[4] * dt
-        rock[2] += rock[5] * dt
-        
-        # Check ground collision
-        if rock[2] <= 5:
-            rock[2] = 5
-            rock[6] = False
+        # Sweep this tick's straight-line trajectory (no gravity)
+        sweep = sweep_projectile(rock, dt)
         
         # Check pokemon collision with improved detection
-        for j in range(len(pokemon_list)):
-            pokemon = pokemon_list[j]
-            if len(pokemon) < 7 or pokemon[6]:  # Skip if caught
-                continue
-            
-            distance = math.sqrt(
-                (rock[0] - pokemon[0])**2 +
-                (rock[1] - pokemon[1])**2 +
-                (rock[2] - pokemon[2])**2
-            )
+        # (size + 10: slightly larger radius to catch all body parts/features)
+        j, t_hit = first_pokemon_hit(sweep, 10)
+        advance_projectile(rock, sweep, 1.0 if t_hit is None else t_hit)
+        if j >= 0:  # Hit!
+            rock[6] = False
+            # Damage Pokemon (reduce health by 15-25 based on Pokemon type)
+            damage = int(game_rng.integers(15, 26))
+            pokemon_store.health[j] -= damage
+            health = int(pokemon_store.health[j])
+            pname = pokemon_types[pokemon_store.ptype[j]][0]
+            # On-screen message
+            message = f"{pname} hit by rock for {damage} damage! Health: {max(0, health)}/{int(pokemon_store.max_health[j])}"
+            show_event_message(message, 2.5)
+            event_log.info(message)
             
-            pdata = pokemon_types[pokemon[3]]
-            collision_radius = pdata[4] + 10  # Slightly larger radius to catch all body parts/features
-            if distance < collision_radius:  # Hit!
-                rock[6] = False
-                # Damage Pokemon (reduce health by 15-25 based on Pokemon type)
-                damage = random.randint(15, 25)
-                pokemon[4] -= damage
-                pname = pdata[0]
-                # On-screen message
-                global last_event_message, last_event_timer
-                last_event_message = f"{pname} hit by rock for {damage} damage! Health: {max(0, int(pokemon[4]))}/{int(pokemon[5])}"
-                last_event_timer = 2.5
-                print(last_event_message)
-                
-                # Remove Pokemon if health <= 0
-                if pokemon[4] <= 0:
-                    print(f"{pname} fainted!")
-                    # Remove the bush associated with this Pokemon before removing Pokemon
-                    remove_bush_for_pokemon(j)
-                    pokemon_list.pop(j)
-                    # Update bush indices for remaining Pokemon
-                    update_bush_indices_after_removal(j)
-                break
+            # Remove Pokemon if health <= 0
+            if health <= 0:
+                event_log.info(f"{pname} fainted!")
+                # Remove the bush associated with this Pokemon before removing Pokemon
+                remove_bush_for_pokemon(j)
+                hud.pokemon_removed(pokemon_store.ptype[j])
+                pokemon_grid.remove(int(pokemon_store.handle[j]))
+                pokemon_store.remove(j)
         
         # Remove inactive rocks
         if not rock[6]:
             rocks_thrown.pop(i)
 
+def add_bush(x, y, z, radius, pokemon_handle):
+    """Append a bush and return its handle"""
+    bush = [x, y, z, radius, pokemon_handle, LOD_UNSET, NO_HANDLE]
+    bush[6] = bush_handles.allocate(len(bush_list))
+    bush_list.append(bush)
+    bush_visibility.added(bush[6], bush)
+    return bush[6]
+
+def get_bush(handle):
+    """The bush a handle refers to, or None if it has been removed"""
+    index = bush_handles.row_of(handle)
+    return bush_list[index] if index >= 0 else None
+
+def remove_bush(handle):
+    """Remove a bush in O(1) by moving the last bush into its place, and unlink it from its pokemon"""
+    index = bush_handles.row_of(handle)
+    if index < 0:
+        return
+    owner = pokemon_store.row_of(bush_list[index][4])
+    if owner >= 0:
+        pokemon_store.bush[owner] = NO_HANDLE
+    bush_handles.release(handle)
+    bush_visibility.removed(handle)
+    last = bush_list.pop()
+    if index < len(bush_list):
+        bush_list[index] = last
+        bush_handles.move(last[6], index)
+
 def remove_bush_for_pokemon(pokemon_index):
     """Remove the bush associated with a specific Pokemon index"""
-    for i in range(len(bush_list) - 1, -1, -1):
-        bush = bush_list[i]
-        if len(bush) >= 5 and bush[4] == pokemon_index:
-            bush_list.pop(i)
-            break
-
-def update_bush_indices_after_removal(removed_index):
-    """Update bush pokemon indices after a Pokemon is removed from the list"""
-    for bush in bush_list:
-        if len(bush) >= 5 and bush[4] > removed_index:
-            bush[4] -= 1  # Decrease index by 1 since Pokemon was removed
+    remove_bush(int(pokemon_store.bush[pokemon_index]))
 
 def attempt_catch(pokemon_index):
     """Attempt to catch a pokemon"""
     global total_caught, experience_points, shop_currency, pokeball_count
     
-    if pokemon_index >= len(pokemon_list):
+    if pokemon_index >= pokemon_store.count or pokemon_store.caught[pokemon_index]:
         return
     
-    pokemon = pokemon_list[pokemon_index]
-    pdata = pokemon_types[pokemon[3]]
+    store = pokemon_store
+    pdata = pokemon_types[store.ptype[pokemon_index]]
+    health = int(store.health[pokemon_index])
+    max_health = int(store.max_health[pokemon_index])
     
     # Calculate catch probability
     base_catch_rate = pdata[5]
-    health_modifier = (pokemon[5] - pokemon[4]) / pokemon[5] * 0.3
+    health_modifier = (max_health - health) / max_health * 0.3
     pokeball_bonus = pokeball_types[current_pokeball_type][4]
     catch_probability = min(0.98, base_catch_rate + health_modifier + pokeball_bonus)
     
-    if random.random() < catch_probability:
+    if game_rng.random() < catch_probability:
         # Successful catch!
-        print(f"Congratulations! You caught a {pdata[0]}!")
-        pokemon[6] = True  # Mark as caught
+        event_log.info(f"Congratulations! You caught a {pdata[0]}!")
+        store.caught[pokemon_index] = True  # Mark as caught
+        pokemon_grid.remove(int(store.handle[pokemon_index]))
+        hud.pokemon_removed(store.ptype[pokemon_index])
         total_caught += 1
         
         # Remove the bush associated with this Pokemon
@@ -1491,133 +3445,124 @@ def attempt_catch(pokemon_index):
         shop_currency += currency_reward
         pokeball_count += 2
         
-        print(f"Gained {exp_reward} EXP and {currency_reward} coins!")
-        print(f"You received 2 Pokeballs! Total: {pokeball_count}")
+        event_log.info(f"Gained {exp_reward} EXP and {currency_reward} coins!")
+        event_log.info(f"You received 2 Pokeballs! Total: {pokeball_count}")
     else:
         # Failed catch
-        print(f"Oh no! The {pdata[0]} broke free!")
-        pokemon[4] = max(1, pokemon[4] - 10)  # Damage pokemon
+        event_log.info(f"Oh no! The {pdata[0]} broke free!")
+        store.health[pokemon_index] = max(1, health - 10)  # Damage pokemon
         experience_points += 2
         shop_currency += 1
+        hud.mark_dirty()
 
 def get_nearest_pokemon():
     """Get nearest pokemon position"""
-    nearest_dist = float('inf')
-    nearest_pos = None
-    
-    for pokemon in pokemon_list:
-        if len(pokemon) < 7 or pokemon[6]:  # Skip if caught
-            continue
-        
-        dist = math.sqrt(
-            (pokemon[0] - player_pos[0])**2 +
-            (pokemon[1] - player_pos[1])**2
-        )
-        
-        if dist < nearest_dist and dist < 150:
-            nearest_dist = dist
-            nearest_pos = [pokemon[0], pokemon[1], pokemon[2]]
-    
-    return nearest_pos
+    n = pokemon_store.count
+    if n == 0:
+        return None
+    
+    dx = pokemon_store.x[:n] - player_pos[0]
+    dy = pokemon_store.y[:n] - player_pos[1]
+    dist_sq = dx * dx + dy * dy
+    # Skip caught Pokemon and anything 150 units or more away
+    dist_sq[pokemon_store.caught[:n] | (dist_sq >= 150 * 150)] = np.inf
+    
+    nearest = int(np.argmin(dist_sq))
+    if dist_sq[nearest] == np.inf:
+        return None
+    return [float(pokemon_store.x[nearest]), float(pokemon_store.y[nearest]), float(pokemon_store.z[nearest])]
 
 def setupCamera():
-    """Setup camera based on mode with improved positioning"""
+    """Compute this frame's camera and load its matrices"""
+    # Follow the interpolated player so the view stays smooth between ticks
+    camera.update(lerp_position(player_pos), player_rotation, player_pitch, is_first_person,
+                  WINDOW_WIDTH, WINDOW_HEIGHT)
     glMatrixMode(GL_PROJECTION)
-    glLoadIdentity()
-    aspect_ratio = WINDOW_WIDTH / WINDOW_HEIGHT
-    gluPerspective(fovY, aspect_ratio, 0.1, 1500)
+    glLoadMatrixd(np.ascontiguousarray(camera.projection.T))  # OpenGL takes column-major
     glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
-    
-    if is_first_person:
-        # First person camera with pitch support - improved positioning
-        # Calculate look direction with both rotation and pitch
-        look_distance = 200  # Increased for better visibility
-        look_x = player_pos[0] + look_distance * math.cos(math.radians(player_rotation)) * math.cos(math.radians(player_pitch))
-        look_y = player_pos[1] + look_distance * math.sin(math.radians(player_rotation)) * math.cos(math.radians(player_pitch))
-        look_z = player_pos[2] + 20 + look_distance * math.sin(math.radians(player_pitch))  # Higher eye level
-        
-        gluLookAt(player_pos[0], player_pos[1], player_pos[2] + 20,  # Higher eye level
-                  look_x, look_y, look_z,
-                  0, 0, 1)
-    else:
-        # Over-the-shoulder camera (right shoulder) with improved positioning
-        camera_distance = 60  # Slightly further for better view
-        camera_height = 30    # Higher for better perspective
-        shoulder_offset = 25  # More offset to the right side
-        
-        # Position camera behind and to the right of player
-        cam_x = player_pos[0] - camera_distance * math.cos(math.radians(player_rotation)) + shoulder_offset * math.cos(math.radians(player_rotation + 90))
-        cam_y = player_pos[1] - camera_distance * math.sin(math.radians(player_rotation)) + shoulder_offset * math.sin(math.radians(player_rotation + 90))
-        cam_z = player_pos[2] + camera_height
-        
-        # Look ahead in the direction player is facing with pitch
-        look_distance = 150  # Increased for better visibility
-        look_x = player_pos[0] + look_distance * math.cos(math.radians(player_rotation)) * math.cos(math.radians(player_pitch))
-        look_y = player_pos[1] + look_distance * math.sin(math.radians(player_rotation)) * math.cos(math.radians(player_pitch))
-        look_z = player_pos[2] + 15 + look_distance * math.sin(math.radians(player_pitch))
-        
-        gluLookAt(cam_x, cam_y, cam_z,
-                  look_x, look_y, look_z,
-                  0, 0, 1)
+    glLoadMatrixd(np.ascontiguousarray(camera.view.T))
+    cull_stats.clear()
+
+def update_aim_camera():
+    """aim_camera at the simulation state (not interpolated), so aiming is the same on replay"""
+    aim_camera.update(player_pos, player_rotation, player_pitch, is_first_person, WINDOW_WIDTH, WINDOW_HEIGHT)
+    return aim_camera
+
+def sphere_in_view(x, y, z, radius):
+    """True if a bounding sphere is within cull_distance and touches the frustum"""
+    if camera.planes is None:
+        return True
+    ex, ey, ez = camera.eye
+    reach = cull_distance + radius
+    if (x - ex)**2 + (y - ey)**2 + (z - ez)**2 > reach * reach:
+        return False
+    for a, b, c, d in camera.plane_rows:
+        if a * x + b * y + c * z + d < -radius:
+            return False
+    return True
+
+def spheres_in_view(centers, radii):
+    """Vectorized sphere_in_view: boolean mask for (n, 3) centers and (n,) radii"""
+    planes = camera.planes
+    if planes is None:
+        return np.ones(len(centers), dtype=bool)
+    offsets = centers - np.asarray(camera.eye)
+    reach = cull_distance + radii
+    near = np.einsum("ij,ij->i", offsets, offsets) <= reach * reach
+    distances = centers @ planes[:, :3].T + planes[:, 3]
+    return near & np.all(distances >= -radii[:, None], axis=1)
+
+def record_culling(kind, drawn, culled):
+    """Add to this frame's drawn/culled counts for one kind of entity"""
+    counts = cull_stats.setdefault(kind, [0, 0])
+    counts[0] += drawn
+    counts[1] += culled
+
+def cull_totals():
+    """(drawn, culled) summed over every kind of entity this frame"""
+    drawn = sum(counts[0] for counts in cull_stats.values())
+    culled = sum(counts[1] for counts in cull_stats.values())
+    return drawn, culled
 
 def keyboardListener(key, x, y):
     """Handle keyboard input"""
-    global player_pos, player_rotation, player_health, player_max_health
+    global player_rotation, player_health
     global is_first_person, current_pokeball_type, shop_currency
-    global is_walking, walk_cycle, mouse_capture_enabled
-    global game_over, opponent_health, opponent_pokeballs, total_caught, experience_points
-    global ultra_balls, pokeball_count, pokemon_list, pokeballs_thrown, rocks_thrown, opponent_pokeballs_thrown
-    
-    # Movement
-    if key == b'w':
-        player_pos[0] += player_speed * math.cos(math.radians(player_rotation))
-        player_pos[1] += player_speed * math.sin(math.radians(player_rotation))
-        is_walking = True
-        walk_cycle += walk_speed
-    elif key == b's':
-        player_pos[0] -= player_speed * math.cos(math.radians(player_rotation))
-        player_pos[1] -= player_speed * math.sin(math.radians(player_rotation))
-        is_walking = True
-        walk_cycle += walk_speed
-    elif key == b'a':
-        # Strafe left (perpendicular to current facing direction)
-        player_pos[0] += player_speed * math.cos(math.radians(player_rotation + 90))
-        player_pos[1] += player_speed * math.sin(math.radians(player_rotation + 90))
-        is_walking = True
-        walk_cycle += walk_speed
-    elif key == b'd':
-        # Strafe right (perpendicular to current facing direction)
-        player_pos[0] += player_speed * math.cos(math.radians(player_rotation - 90))
-        player_pos[1] += player_speed * math.sin(math.radians(player_rotation - 90))
-        is_walking = True
-        walk_cycle += walk_speed
+    global mouse_capture_enabled
+    global game_over, total_caught, experience_points
+    global ultra_balls, pokeball_count
+    global profiler_overlay, profiler_stats
+    
+    # Movement keys are only held here; update_player_movement() moves the player each tick
+    if key.lower() in MOVEMENT_KEYS:
+        keys_held.add(key.lower())
     
     # Camera toggle
     elif key == b'c':
         is_first_person = not is_first_person
-        print(f"Camera mode: {'1st Person' if is_first_person else '3rd Person'}")
+        event_log.info(f"Camera mode: {'1st Person' if is_first_person else '3rd Person'}")
+        hud.mark_dirty()
     
     # Mouse capture toggle
     elif key == b'm':
         mouse_capture_enabled = not mouse_capture_enabled
-        print(f"Mouse control: {'Enabled' if mouse_capture_enabled else 'Disabled'}")
+        event_log.info(f"Mouse control: {'Enabled' if mouse_capture_enabled else 'Disabled'}")
+        hud.mark_dirty()
     
     # Jump (apply impulse only if grounded)
     elif key == b' ':
         global player_vel_z, is_grounded
         if is_grounded:
-            player_vel_z = 18.0
+            player_vel_z = JUMP_VELOCITY
             is_grounded = False
     
     # Reset position or restart game
     elif key == b'r':
         if game_over:
             # Restart the entire game
-            global player_health, opponent_health, opponent_pokeballs, total_caught, experience_points, shop_currency, ultra_balls, pokeball_count
+            global player_health, total_caught, experience_points, shop_currency, ultra_balls, pokeball_count
             player_health = player_max_health
-            opponent_health = opponent_max_health
-            opponent_pokeballs = 10
+            opponents.refill()
             total_caught = 0
             experience_points = 0
             shop_currency = 0
@@ -1626,52 +3571,88 @@ def keyboardListener(key, x, y):
             game_over = False
             
             # Clear all Pokémon and pokéballs
-            global pokemon_list, pokeballs_thrown, rocks_thrown, opponent_pokeballs_thrown
-            pokemon_list.clear()
+            pokemon_store.clear()
+            pokemon_grid.clear()
+            bush_list.clear()
+            bush_handles.clear()
+            bush_visibility.clear()
+            world_chunks.clear()
+            hud.reset()
             pokeballs_thrown.clear()
             rocks_thrown.clear()
             opponent_pokeballs_thrown.clear()
             
-            print("Game restarted!")
+            event_log.info("Game restarted!")
         else:
             # Just reset position
             player_pos[0] = 0
             player_pos[1] = 0
             player_pos[2] = 30
             player_rotation = 0
-            print("Position reset!")
+            event_log.info("Position reset!")
     
     # Heal
     elif key == b'h':
         player_health = min(player_max_health, player_health + 20)
-        print(f"Healed! Health: {player_health}/{player_max_health}")
+        event_log.info(f"Healed! Health: {player_health}/{player_max_health}")
+        hud.mark_dirty()
     
     # Damage
     elif key == b'j':
         player_health = max(0, player_health - 10)
-        print(f"Damaged! Health: {player_health}/{player_max_health}")
+        event_log.info(f"Damaged! Health: {player_health}/{player_max_health}")
+        hud.mark_dirty()
     
     # Pokeball selection
     elif key == b'1':
         current_pokeball_type = 0
-        print(f"Selected: {pokeball_types[0][0]}")
+        event_log.info(f"Selected: {pokeball_types[0][0]}")
+        hud.mark_dirty()
     elif key == b'2' and shop_currency >= pokeball_types[1][5]:
         current_pokeball_type = 1
-        print(f"Selected: {pokeball_types[1][0]}")
+        event_log.info(f"Selected: {pokeball_types[1][0]}")
+        hud.mark_dirty()
     elif key == b'3' and shop_currency >= pokeball_types[2][5]:
         current_pokeball_type = 2
-        print(f"Selected: {pokeball_types[2][0]}")
+        event_log.info(f"Selected: {pokeball_types[2][0]}")
+        hud.mark_dirty()
     elif key == b'4' and shop_currency >= pokeball_types[3][5]:
         current_pokeball_type = 3
-        print(f"Selected: {pokeball_types[3][0]}")
+        event_log.info(f"Selected: {pokeball_types[3][0]}")
+        hud.mark_dirty()
     
-    # Ultra Ball (X key) - instant opponent defeat
-    elif key == b'x' and ultra_balls > 0:
+    # Ultra Ball (X key) - instant defeat of the nearest opponent
+    elif key == b'x' and ultra_balls > 0 and opponents.count > 0:
         ultra_balls -= 1
-        opponent_health = 0
-        last_event_message = "ULTRA BALL! Opponent defeated instantly!"
-        last_event_timer = 3.0
-        print(f"Ultra Ball used! Opponent defeated! Ultra Balls remaining: {ultra_balls}")
+        opponents.health[opponents.nearest(player_pos[0], player_pos[1])] = 0
+        show_event_message("ULTRA BALL! Opponent defeated instantly!", 3.0)
+        event_log.info(f"Ultra Ball used! Opponent defeated! Ultra Balls remaining: {ultra_balls}")
+    
+    # Frame profiler overlay (timers only run while it is shown)
+    elif key == b'p':
+        profiler_overlay = not profiler_overlay
+        profiler.set_enabled(profiler_overlay)
+        profiler_stats = None
+        event_log.info(f"Profiler: {'On' if profiler_overlay else 'Off'}")
+    
+    # Export the profiler's buffered frames as a Chrome trace
+    elif key == b'o' and not replaying:
+        frames = profiler.export_chrome_trace(trace_path)
+        show_event_message(f"Wrote {frames} frames to {trace_path}" if frames else "Profiler has no frames (press P)", 3.0)
+
+def keyboardUpListener(key, x, y):
+    """Handle key releases"""
+    keys_held.discard(key.lower())  # Case-insensitive, so Shift changing between down and up can't strand a key
+
+def entryListener(state):
+    """Release every held key when the pointer leaves the window: their key-ups go elsewhere"""
+    if state == GLUT_LEFT:
+        keys_held.clear()
+
+def visibilityListener(state):
+    """Release every held key when the window is hidden (minimized or switched away from)"""
+    if state == GLUT_NOT_VISIBLE:
+        keys_held.clear()
 
 def specialKeyListener(key, x, y):
     """Handle special keys"""
@@ -1689,49 +3670,13 @@ def specialKeyListener(key, x, y):
 def mouseListener(button, state, x, y):
     """Handle mouse input"""
     if state == GLUT_DOWN:
-        # Calculate camera look direction for throwing
-        if is_first_person:
-            # In first person, cast a ray from eye using rotation and pitch
-            look_distance = 200
-            dir_x = math.cos(math.radians(player_rotation)) * math.cos(math.radians(player_pitch))
-            dir_y = math.sin(math.radians(player_rotation)) * math.cos(math.radians(player_pitch))
-            dir_z = math.sin(math.radians(player_pitch))
-            target_x = player_pos[0] + dir_x * look_distance
-            target_y = player_pos[1] + dir_y * look_distance
-            target_z = player_pos[2] + 20 + dir_z * look_distance
-        else:
-            # In third person, calculate direction from camera to crosshair
-            # Match camera params with setupCamera for consistency
-            camera_distance = 60
-            camera_height = 30
-            shoulder_offset = 25
-            
-            cam_x = player_pos[0] - camera_distance * math.cos(math.radians(player_rotation)) + shoulder_offset * math.cos(math.radians(player_rotation + 90))
-            cam_y = player_pos[1] - camera_distance * math.sin(math.radians(player_rotation)) + shoulder_offset * math.sin(math.radians(player_rotation + 90))
-            cam_z = player_pos[2] + camera_height
-            
-            # Calculate look direction with pitch (same as camera)
-            look_distance = 150
-            look_x = player_pos[0] + look_distance * math.cos(math.radians(player_rotation)) * math.cos(math.radians(player_pitch))
-            look_y = player_pos[1] + look_distance * math.sin(math.radians(player_rotation)) * math.cos(math.radians(player_pitch))
-            look_z = player_pos[2] + 15 + look_distance * math.sin(math.radians(player_pitch))
-            
-            # Direction from camera to look point
-            dir_x = look_x - cam_x
-            dir_y = look_y - cam_y
-            dir_z = look_z - cam_z
-            
-            # Normalize direction
-            length = math.sqrt(dir_x*dir_x + dir_y*dir_y + dir_z*dir_z)
-            if length > 0:
-                dir_x /= length
-                dir_y /= length
-                dir_z /= length
-            
-            # Target point in look direction FROM CAMERA to align with crosshair
-            target_x = cam_x + 200 * dir_x
-            target_y = cam_y + 200 * dir_y
-            target_z = cam_z + 200 * dir_z
+        # Aim where the crosshair points: straight along the view from the eye
+        aim = update_aim_camera()
+        ex, ey, ez = aim.eye
+        fx, fy, fz = aim.forward
+        target_x = ex + AIM_DISTANCE * fx
+        target_y = ey + AIM_DISTANCE * fy
+        target_z = ez + AIM_DISTANCE * fz
         
         if button == GLUT_LEFT_BUTTON:
             # Left click - throw rock
@@ -1742,7 +3687,7 @@ def mouseListener(button, state, x, y):
 
 def mouseMotionListener(x, y):
     """Handle mouse movement for character rotation"""
-    global player_rotation, player_pitch, mouse_x, mouse_y, mouse_capture_enabled
+    global player_rotation, player_pitch, mouse_x, mouse_y
     
     # Only process mouse movement if mouse capture is enabled
     if not mouse_capture_enabled:
@@ -1774,55 +3719,326 @@ def mouseMotionListener(x, y):
     mouse_x = x
     mouse_y = y
 
-def idle():
-    """Idle function for game updates"""
-    global spawn_timer, last_time, last_event_timer, player_vel_z, is_grounded, level_time_left, level_caught_this_level, current_level
+# Input callbacks by the kind letter used in recordings
+INPUT_LISTENERS = {
+    "k": keyboardListener,
+    "u": keyboardUpListener,
+    "e": entryListener,
+    "v": visibilityListener,
+    "s": specialKeyListener,
+    "m": mouseListener,
+    "p": mouseMotionListener,
+}
+
+def update_player_movement(dt):
+    """Walk the player from the held movement keys (diagonals at the same speed)"""
+    global is_walking, walk_cycle
+    forward = left = 0
+    for key in keys_held:
+        step = MOVEMENT_KEYS.get(key)
+        if step is not None:
+            forward += step[0]
+            left += step[1]
+    is_walking = forward != 0 or left != 0
+    if not is_walking:
+        return
     
-    current_time = time.time()
-    if 'last_time' not in globals():
-        last_time = current_time
+    distance = player_speed * dt / math.hypot(forward, left)
+    angle = math.radians(player_rotation)
+    cos_r, sin_r = math.cos(angle), math.sin(angle)
+    # Left of the facing direction is the facing rotated by +90 degrees: (-sin, cos)
+    player_pos[0] += (forward * cos_r - left * sin_r) * distance
+    player_pos[1] += (forward * sin_r + left * cos_r) * distance
+    walk_cycle += walk_speed * dt
+
+def update_game(dt):
+    """Advance the whole simulation by dt seconds (no rendering)"""
+    global spawn_timer, last_event_timer, player_vel_z, is_grounded, sim_tick
     
-    dt = current_time - last_time
-    last_time = current_time
+    update_player_movement(dt)
+    
+    # Keep the player in the world and the chunks around them live
+    edge = GRID_LENGTH - 50
+    player_pos[0] = max(-edge, min(edge, player_pos[0]))
+    player_pos[1] = max(-edge, min(edge, player_pos[1]))
+    with profiler.scope("update_chunks"):
+        update_chunks()
     
     # Spawn pokemon
     spawn_timer += dt
     if spawn_timer > spawn_interval:
         spawn_timer = 0
-        spawn_pokemon()
+        with profiler.scope("spawn_pokemon"):
+            spawn_pokemon()
     
     # Update game objects
-    update_pokemon(dt)
-    update_pokeballs(dt)
-    update_rocks(dt)
-    update_opponent(dt)
-    update_opponent_pokeballs(dt)
+    with profiler.scope("update_pokemon"):
+        update_pokemon(dt)
+    with profiler.scope("update_pokeballs"):
+        update_pokeballs(dt)
+    with profiler.scope("update_rocks"):
+        update_rocks(dt)
+    with profiler.scope("update_opponents"):
+        update_opponents(dt)
+    with profiler.scope("update_opponent_pokeballs"):
+        update_opponent_pokeballs(dt)
     
     # Apply gravity and jump physics
-    gravity = 40.0
     ground_z = 30.0
     # Integrate vertical velocity
-    player_vel_z -= gravity * dt
-    player_pos[2] += player_vel_z
+    player_vel_z -= GRAVITY * dt
+    player_pos[2] += player_vel_z * dt
     # Ground collision
     if player_pos[2] <= ground_z:
         player_pos[2] = ground_z
         player_vel_z = 0.0
         is_grounded = True
+    
+    # Which bushes the detection radius reaches, read by the draw code
+    with profiler.scope("update_visibility"):
+        bush_visibility.update(player_pos[0], player_pos[1], player_radius)
 
     # Decrement event message timer
     if last_event_timer > 0:
         last_event_timer = max(0.0, last_event_timer - dt)
+        if last_event_timer == 0:
+            hud.mark_dirty()  # Message just expired
+    
+    sim_tick += 1
+
+def snapshot_positions():
+    """Remember where every moving entity is before the next tick"""
+    previous_positions.clear()
+    pokemon_store.snapshot()
+    opponents.snapshot()
+    for group in (pokeballs_thrown, rocks_thrown, opponent_pokeballs_thrown):
+        for entity in group:
+            previous_positions[id(entity)] = (entity, entity[0], entity[1], entity[2])
+    previous_positions[id(player_pos)] = (player_pos, player_pos[0], player_pos[1], player_pos[2])
+
+def lerp_position(entity):
+    """Position of an entity blended between the last two ticks for drawing"""
+    prev = previous_positions.get(id(entity))
+    # Entities spawned since the last tick have nothing to blend from
+    if prev is None or prev[0] is not entity:
+        return entity[0], entity[1], entity[2]
+    a = render_alpha
+    return (prev[1] + (entity[0] - prev[1]) * a,
+            prev[2] + (entity[1] - prev[2]) * a,
+            prev[3] + (entity[2] - prev[3]) * a)
 
+def pokemon_render_position(index):
+    """Position of a pokemon blended between the last two ticks for drawing"""
+    store = pokemon_store
+    a = render_alpha
+    return (float(store.prev_x[index] + (store.x[index] - store.prev_x[index]) * a),
+            float(store.prev_y[index] + (store.y[index] - store.prev_y[index]) * a),
+            float(store.prev_z[index] + (store.z[index] - store.prev_z[index]) * a))
 
+def step_simulation(frame_dt):
+    """Run as many fixed ticks as frame_dt covers and return how many ran"""
+    global sim_accumulator, render_alpha
+    
+    tick_dt = 1.0 / sim_tick_hz
+    sim_accumulator += frame_dt
+    
+    steps = 0
+    while sim_accumulator >= tick_dt and steps < max_catchup_steps:
+        snapshot_positions()
+        with profiler.scope("tick"):
+            update_game(tick_dt)
+        sim_accumulator -= tick_dt
+        steps += 1
+    
+    # Too far behind (long hitch): drop the backlog instead of spiralling
+    if sim_accumulator >= tick_dt:
+        sim_accumulator = 0.0
+    
+    render_alpha = sim_accumulator / tick_dt
+    return steps
+
+def idle():
+    """Idle function for game updates"""
+    global last_time
+    
+    profiler.begin_frame()  # A frame runs from here to the end of showScreen()
+    current_time = time.time()
+    if last_time == 0:
+        last_time = current_time
+    
+    dt = current_time - last_time
+    last_time = current_time
+    
+    step_simulation(dt * time_scale)
     
     glutPostRedisplay()
 
+def run_headless(duration=60.0, dt=1.0 / 60.0, scale=1.0):
+    """Run the simulation without a window as fast as the CPU allows.
+    
+    Each tick advances the game by dt * scale simulated seconds until
+    duration simulated seconds have passed. Returns run statistics.
+    """
+    step = dt * scale
+    if step <= 0:
+        raise ValueError("dt and scale must be positive")
+    
+    ticks = max(1, int(math.ceil(duration / step - 1e-9)))
+    start = time.perf_counter()
+    for _ in range(ticks):
+        profiler.begin_frame()  # Each tick is a frame when profiling headless
+        update_game(step)
+        profiler.end_frame()
+    sim_time = ticks * step
+    wall_time = time.perf_counter() - start
+    
+    return {
+        "ticks": ticks,
+        "sim_time": sim_time,
+        "wall_time": wall_time,
+        "ticks_per_sec": ticks / wall_time if wall_time > 0 else float('inf'),
+        "pokemon": pokemon_store.count,
+        "player_health": player_health,
+        "opponent_health": opponents.health[:opponents.count].tolist(),
+        "total_caught": total_caught,
+        "projectile_high_water": {
+            "pokeballs": pokeballs_thrown.high_water,
+            "rocks": rocks_thrown.high_water,
+            "opponent_pokeballs": opponent_pokeballs_thrown.high_water,
+        },
+    }
+
+def seed_game(seed=None):
+    """Recreate game_rng from seed (a fresh random seed when None) and return the seed"""
+    global game_seed, game_rng
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % (1 << 63))
+    game_seed = seed
+    game_rng = np.random.default_rng(seed)
+    return seed
+
+def state_digest():
+    """Hash of the simulation state, for checking that a replay ended identically"""
+    n = pokemon_store.count
+    digest = hashlib.sha1()
+    for name in ("x", "y", "z", "ptype", "health", "caught"):
+        digest.update(getattr(pokemon_store, name)[:n].tobytes())
+    for name in ("x", "y", "z", "direction"):
+        digest.update(getattr(opponents, name).tobytes())
+    for pool in (pokeballs_thrown, rocks_thrown, opponent_pokeballs_thrown):
+        digest.update(repr([slot[:6] for slot in pool]).encode())
+    for key in sorted(world_chunks.frozen):
+        digest.update(repr(key).encode() + world_chunks.frozen[key])
+    digest.update(repr((sim_tick, list(player_pos), player_rotation, player_pitch, player_health,
+                        opponents.health.tolist(), opponents.pokeballs.tolist(),
+                        total_caught, experience_points, shop_currency, pokeball_count,
+                        len(bush_list))).encode())
+    return digest.hexdigest()
+
+class InputRecorder:
+    """Writes every input callback, stamped with the tick it arrived before.
+    
+    The file is a JSON header line (seed, tick rate, trainers) followed by one line
+    per event, "<tick> <kind> <args...>", and an "end <ticks> <digest>" line
+    from close(). Kinds are those of INPUT_LISTENERS; keyboard keys are hex.
+    Version 2 added key releases ("u"), which held-key movement depends on;
+    version 3 added the number of opponent trainers to the header; version 4
+    added the pointer leaving ("e") and the window hiding ("v"), which release
+    every held key.
+    """
+    def __init__(self, path):
+        self.file = open(path, "w")
+        self.file.write(json.dumps({"version": RECORDING_VERSION, "seed": game_seed, "tick_hz": sim_tick_hz,
+                                    "opponents": opponents.count}) + "\n")
+    
+    def record(self, kind, args):
+        if kind in ("k", "u"):
+            args = (args[0].hex(),) + tuple(args[1:])
+        self.file.write(f"{sim_tick} {kind} {' '.join(str(arg) for arg in args)}\n")
+    
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.write(f"end {sim_tick} {state_digest()}\n")
+        self.file.close()
+
+def recorded(kind, listener):
+    """Wrap a GLUT input callback so it is logged while recording"""
+    def callback(*args):
+        if input_recorder is not None:
+            input_recorder.record(kind, args)
+        listener(*args)
+    return callback
+
+def load_recording(path):
+    """Read a recording into (header, {tick: [(kind, args)]}, end tick, digest)"""
+    events = {}
+    end_tick, digest = None, None
+    with open(path) as file:
+        header = json.loads(file.readline())
+        for line in file:
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == "end":
+                end_tick, digest = int(fields[1]), fields[2]
+                break
+            kind = fields[1]
+            if kind in ("k", "u"):
+                args = (bytes.fromhex(fields[2]),) + tuple(int(arg) for arg in fields[3:])
+            else:
+                args = tuple(int(arg) for arg in fields[2:])
+            events.setdefault(int(fields[0]), []).append((kind, args))
+    if end_tick is None:  # Recording cut short: play through the last event
+        end_tick = max(events, default=0) + 1
+    return header, events, end_tick, digest
+
+def replay_inputs(path):
+    """Re-run a recording headless, as fast as possible, and return run statistics.
+    
+    The seed, tick rate and trainer count come from the recording; every
+    input is fed to its listener before the tick it was stamped with, exactly
+    as it was live.
+    """
+    global sim_tick_hz, opponent_count, replaying
+    
+    header, events, end_tick, digest = load_recording(path)
+    if header.get("version", 1) != RECORDING_VERSION:
+        raise SystemExit(f"{path} is a version {header.get('version', 1)} recording; "
+                         f"this build replays version {RECORDING_VERSION} only")
+    seed_game(header["seed"])
+    opponent_count = header["opponents"]
+    opponents.spawn(opponent_count)
+    sim_tick_hz = header["tick_hz"]
+    step = 1.0 / sim_tick_hz
+    
+    start = time.perf_counter()
+    replaying = True
+    try:
+        while sim_tick < end_tick:
+            for kind, args in events.get(sim_tick, ()):
+                INPUT_LISTENERS[kind](*args)
+            update_game(step)
+    finally:
+        replaying = False
+    wall_time = time.perf_counter() - start
+    
+    final = state_digest()
+    return {
+        "ticks": end_tick,
+        "wall_time": wall_time,
+        "ticks_per_sec": end_tick / wall_time if wall_time > 0 else float('inf'),
+        "events": sum(len(tick_events) for tick_events in events.values()),
+        "digest": final,
+        "matches": digest is None or final == digest,
+    }
+
 def reshapeListener(width, height):
     """Handle window resizing"""
     global WINDOW_WIDTH, WINDOW_HEIGHT
     WINDOW_WIDTH = width
     WINDOW_HEIGHT = height
+    hud.mark_dirty()  # HUD strings are laid out from the window size
     glViewport(0, 0, width, height)
     glutPostRedisplay()
 
@@ -1830,7 +4046,7 @@ def draw_clouds():
     """Draw clouds in the sky using spheres"""
     glPushMatrix()
     
-    # Cloud positions and sizes
+    # Cloud positions and sizes, repeated in every chunk around the player
     cloud_data = [
         [-200, 300, 200, 30],   # x, y, z, size
         [150, 250, 180, 25],
@@ -1841,57 +4057,93 @@ def draw_clouds():
         [0, 400, 200, 30],
         [-250, 150, 185, 29]
     ]
+    center = world_chunks.key_of(player_pos[0], player_pos[1])
+    nearby = world_chunks.keys_around(center, ACTIVE_CHUNK_RADIUS)
+    clouds = [((chunk, index), x + (chunk[0] + 0.5) * CHUNK_SIZE, y + (chunk[1] + 0.5) * CHUNK_SIZE, z, size)
+              for chunk in nearby for index, (x, y, z, size) in enumerate(cloud_data)]
+    for key in [key for key in cloud_lods if key[0] not in nearby]:
+        del cloud_lods[key]
     
     # Draw each cloud as a group of spheres
     glColor3f(1.0, 1.0, 1.0)  # White clouds
     
-    for cloud in cloud_data:
-        x, y, z, size = cloud
+    drawn = culled = 0
+    for key, x, y, z, size in clouds:
+        if not sphere_in_view(x, y, z, size * CLOUD_BOUND_SCALE):
+            culled += 1
+            continue
+        drawn += 1
+        
+        # Tessellation from projected size; clouds are never small enough for impostors
+        level = select_lod(x, y, z, size, cloud_lods.get(key, LOD_UNSET))
+        cloud_lods[key] = level
+        detail = CLOUD_LOD_TESSELLATION[min(level, len(CLOUD_LOD_TESSELLATION) - 1)]
+        puff_detail = max(detail - 2, 4)
         
         # Main cloud sphere
         glPushMatrix()
         glTranslatef(x, y, z)
-        glutSolidSphere(size, 10, 10)
+        glutSolidSphere(size, detail, detail)
         glPopMatrix()
         
         # Additional spheres to make clouds more fluffy
         glPushMatrix()
         glTranslatef(x + size * 0.6, y, z - size * 0.2)
-        glutSolidSphere(size * 0.8, 8, 8)
+        glutSolidSphere(size * 0.8, puff_detail, puff_detail)
         glPopMatrix()
         
         glPushMatrix()
         glTranslatef(x - size * 0.5, y + size * 0.3, z + size * 0.1)
-        glutSolidSphere(size * 0.7, 8, 8)
+        glutSolidSphere(size * 0.7, puff_detail, puff_detail)
         glPopMatrix()
         
         glPushMatrix()
         glTranslatef(x + size * 0.2, y - size * 0.4, z + size * 0.3)
-        glutSolidSphere(size * 0.6, 6, 6)
+        glutSolidSphere(size * 0.6, max(detail - 4, 4), max(detail - 4, 4))
         glPopMatrix()
     
     glPopMatrix()
+    record_culling("clouds", drawn, culled)
 
 def showScreen():
     """Main rendering function"""
+    global font_texture
+    
+    # Bake the font before clearing: it is rendered into the back buffer
+    if font_texture is None:
+        font_texture = build_font_atlas()
+    
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
     glLoadIdentity()
     glViewport(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT)
     
-    setupCamera()
+    with profiler.scope("setupCamera"):
+        setupCamera()
     
     # Draw 3D world
-    draw_terrain()
-    draw_clouds()
+    with profiler.scope("draw_terrain"):
+        draw_terrain()
+    with profiler.scope("draw_clouds"):
+        draw_clouds()
     if not is_first_person:
-        draw_player()
-    draw_bushes()  # Draw bushes around Pokemon
-    draw_player_radius()  # Draw player detection radius
-    draw_pokemon()  # Only visible Pokemon are drawn
-    draw_pokeballs()
-    draw_rocks()
-    draw_opponent()  # Draw AI opponent
-    draw_opponent_pokeballs()  # Draw opponent's pokeballs
+        with profiler.scope("draw_player"):
+            draw_player()
+    with profiler.scope("draw_bushes"):
+        draw_bushes()  # Draw bushes around Pokemon
+    with profiler.scope("draw_player_radius"):
+        draw_player_radius()  # Draw player detection radius
+    with profiler.scope("draw_pokemon"):
+        draw_pokemon()  # Only visible Pokemon are drawn
+    with profiler.scope("draw_projectiles"):
+        draw_pokeballs()
+        draw_rocks()
+        draw_opponent_pokeballs()  # Draw opponent's pokeballs
+    with profiler.scope("draw_opponents"):
+        draw_opponents()  # Draw AI opponents
+    
+    # World labels in one draw call, before the HUD so its bars and overlays cover them
+    with profiler.scope("flush_labels"):
+        flush_text()
     
     # Draw 2D HUD
     glMatrixMode(GL_PROJECTION)
@@ -1904,10 +4156,13 @@ def showScreen():
     glLoadIdentity()
     
     glDisable(GL_DEPTH_TEST)
-    if game_over:
-        draw_game_over_screen()
-    else:
-        draw_hud()
+    with profiler.scope("draw_hud"):
+        if game_over:
+            draw_game_over_screen()
+        else:
+            draw_hud()
+        if profiler_overlay:
+            draw_profiler_overlay()
     glEnable(GL_DEPTH_TEST)
     
     glPopMatrix()
@@ -1915,10 +4170,100 @@ def showScreen():
     glPopMatrix()
     glMatrixMode(GL_MODELVIEW)
     
-    glutSwapBuffers()
+    # All HUD strings in one draw call
+    with profiler.scope("flush_text"):
+        flush_text()
+    
+    with profiler.scope("swap_buffers"):
+        glutSwapBuffers()
+    profiler.end_frame()
+
+def parse_args():
+    """Parse command-line options shared by the windowed and headless modes"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Pokemon Catching Game")
+    parser.add_argument("--headless", action="store_true", help="run without OpenGL/GLUT")
+    parser.add_argument("--tick-hz", type=float, default=sim_tick_hz, help="fixed simulation ticks per second")
+    parser.add_argument("--max-catchup", type=int, default=max_catchup_steps, help="most ticks run per frame before dropping time")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="multiplier applied to every step")
+    parser.add_argument("--seconds", type=float, default=60.0, help="simulated seconds to run (headless)")
+    parser.add_argument("--cull-distance", type=float, default=cull_distance, help="skip drawing entities farther than this from the camera")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the game's random stream")
+    parser.add_argument("--record", metavar="PATH", help="log tick-stamped input to PATH for --replay")
+    parser.add_argument("--replay", metavar="PATH", help="re-run a --record log headless at full speed")
+    parser.add_argument("--profile", action="store_true", help="start with the frame profiler on (toggle with P)")
+    parser.add_argument("--trace", metavar="PATH", default=trace_path, help="Chrome trace file written by the O key (or after a headless --profile run)")
+    parser.add_argument("--opponents", type=int, default=opponent_count, help="AI trainers in the match")
+    parser.add_argument("--ai-workers", type=int, default=0, help="run pokemon AI in this many worker processes (needs more than one CPU)")
+    parser.add_argument("--log-file", metavar="PATH", help="append game events here instead of printing them")
+    parser.add_argument("--log-level", choices=list(EventLog.LEVELS), default="info", help="least severe game event logged")
+    parser.add_argument("--dt", type=float, default=None, help="headless step in seconds (default 1/tick-hz)")
+    return parser.parse_args()
+
+def headless_main(args):
+    """Command-line entry point for display-less runs"""
+    if args.replay:
+        stats = replay_inputs(args.replay)
+        event_log.flush()
+        print(f"Replayed {stats['events']} inputs over {stats['ticks']} ticks "
+              f"({stats['wall_time']:.3f}s wall, {stats['ticks_per_sec']:.0f} ticks/s)")
+        print(f"End state {stats['digest']}: {'matches' if stats['matches'] else 'DIFFERS FROM'} the recording")
+        if not stats["matches"]:
+            raise SystemExit(1)
+        return
+    
+    dt = args.dt if args.dt is not None else 1.0 / sim_tick_hz
+    stats = run_headless(args.seconds, dt, args.time_scale)
+    event_log.flush()  # Game events first, then the summary
+    print(f"Simulated {stats['sim_time']:.1f}s in {stats['ticks']} ticks "
+          f"({stats['wall_time']:.3f}s wall, {stats['ticks_per_sec']:.0f} ticks/s)")
+    print(f"Pokemon: {stats['pokemon']}, Caught: {stats['total_caught']}, "
+          f"Health: {stats['player_health']}, Opponent health: {' '.join(map(str, stats['opponent_health']))}")
+    peaks = stats["projectile_high_water"]
+    print(f"Projectiles in flight (peak): {peaks['pokeballs']} pokeballs, {peaks['rocks']} rocks, "
+          f"{peaks['opponent_pokeballs']} opponent pokeballs")
+    if event_log.dropped:
+        print(f"Event log dropped {event_log.dropped} records (queue of {EVENT_LOG_CAPACITY} was full)")
+    
+    if profiler.enabled:
+        (frame_avg, frame_p99), stages = profiler.stats()
+        print(f"Profile of the last {len(profiler.frames)} ticks (avg / p99 ms): tick {frame_avg:.3f} / {frame_p99:.3f}")
+        for name, average, p99 in stages:
+            print(f"  {name:<26} {average:.3f} / {p99:.3f}")
+        frames = profiler.export_chrome_trace(args.trace)
+        print(f"Wrote {frames} ticks to {args.trace}")
 
 def main():
     """Main function"""
+    global sim_tick_hz, max_catchup_steps, time_scale, cull_distance, input_recorder
+    global profiler_overlay, trace_path, pokemon_ai, opponent_count
+    
+    args = parse_args()
+    if args.tick_hz <= 0:
+        raise SystemExit("--tick-hz must be positive")
+    sim_tick_hz = args.tick_hz
+    max_catchup_steps = max(1, args.max_catchup)
+    time_scale = args.time_scale
+    cull_distance = args.cull_distance
+    seed_game(args.seed)
+    opponent_count = max(0, args.opponents)
+    opponents.spawn(opponent_count)
+    trace_path = args.trace
+    event_log.level = EventLog.LEVELS[args.log_level]
+    if args.log_file:
+        event_log.open(args.log_file)
+    profiler_overlay = args.profile
+    profiler.set_enabled(args.profile)
+    # Before GLUT starts, so no worker inherits a GL context
+    pokemon_ai = start_pokemon_ai(args.ai_workers)
+    if pokemon_ai is not None:
+        atexit.register(pokemon_ai.close)
+    
+    if HEADLESS:
+        headless_main(args)
+        return
+    
     glutInit()
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
     glutInitWindowSize(WINDOW_WIDTH, WINDOW_HEIGHT)
@@ -1940,11 +4285,15 @@ def main():
     
     glutDisplayFunc(showScreen)
     glutReshapeFunc(reshapeListener)
-    glutKeyboardFunc(keyboardListener)
-    glutSpecialFunc(specialKeyListener)
-    glutMouseFunc(mouseListener)
-    glutMotionFunc(mouseMotionListener)
-    glutPassiveMotionFunc(mouseMotionListener)
+    glutIgnoreKeyRepeat(1)  # Held keys are tracked from down/up events, repeats would only flood the queue
+    glutKeyboardFunc(recorded("k", keyboardListener))
+    glutKeyboardUpFunc(recorded("u", keyboardUpListener))
+    glutEntryFunc(recorded("e", entryListener))
+    glutVisibilityFunc(recorded("v", visibilityListener))
+    glutSpecialFunc(recorded("s", specialKeyListener))
+    glutMouseFunc(recorded("m", mouseListener))
+    glutMotionFunc(recorded("p", mouseMotionListener))
+    glutPassiveMotionFunc(recorded("p", mouseMotionListener))
     glutIdleFunc(idle)
     
     print("=== Pokemon Catching Game - Simplified ===")
@@ -1957,9 +4306,20 @@ def main():
     print("  R - Reset position")
     print("  H - Heal, J - Damage")
     print("  1-4 - Select Pokeball type")
+    print("  P - Frame profiler, O - Save Chrome trace")
     print("\nStarting game...")
     
-    glutMainLoop()
+    if args.record:
+        input_recorder = InputRecorder(args.record)
+        print(f"Recording input to {args.record} (seed {game_seed})")
+        # Return from the main loop on window close so the recording is finished
+        glutSetOption(GLUT_ACTION_ON_WINDOW_CLOSE, GLUT_ACTION_GLUTMAINLOOP_RETURNS)
+    
+    try:
+        glutMainLoop()
+    finally:
+        if input_recorder is not None:
+            input_recorder.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""Scaling benchmarks for the per-tick update functions.
+
+Seeds headless worlds of increasing size, times each update function per
+call and writes ops/sec with variance as JSON. Pass --baseline with an
+earlier run's JSON to compare against it.
+
+    python benchmark.py --output results.json
+    python benchmark.py --baseline results.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+
+os.environ["POKEMON_HEADLESS"] = "1"  # Import the game without OpenGL
+
+import numpy as np
+
+import Group11_project as game
+
+DEFAULT_SIZES = (20, 1000, 10000, 100000)
+WORLD_SPACING = 20.0  # World half-size grows as sqrt(n) * WORLD_SPACING to keep density; also the minimum gap
+TICK = 1.0 / 60.0
+
+# What is rebuilt before each sample: nothing, the projectile pools, or the
+# whole seeded world (for functions that catch, hurt or add pokemon)
+NO_RESET, PROJECTILES, WORLD = "none", "projectiles", "world"
+
+BENCHMARKS = (
+    # name, callable, reset before each sample
+    ("update_pokemon", lambda: game.update_pokemon(TICK), NO_RESET),
+    ("update_pokeballs", lambda: game.update_pokeballs(TICK), WORLD),
+    ("update_rocks", lambda: game.update_rocks(TICK), WORLD),
+    ("update_opponent_pokeballs", lambda: game.update_opponent_pokeballs(TICK), PROJECTILES),
+    ("spawn_pokemon", game.spawn_pokemon, WORLD),
+    ("get_nearest_pokemon", game.get_nearest_pokemon, NO_RESET),
+)
+
+def reset_world():
+    """Clear every entity the benchmarks create"""
+    game.pokemon_store.clear()
+    game.pokemon_grid.clear()
+    game.bush_list.clear()
+    game.bush_handles.clear()
+    game.bush_visibility.clear()
+    game.world_chunks.clear()
+    game.hud.reset()
+    for pool in (game.pokeballs_thrown, game.rocks_thrown, game.opponent_pokeballs_thrown):
+        pool.clear()
+    game.previous_positions.clear()
+    game.player_pos[:] = [0.0, 0.0, 30.0]
+    game.player_health = game.player_max_health
+
+def seed_world(size, seed):
+    """Fill the world with size pokemon (and their bushes), Poisson-disk spaced at constant density"""
+    reset_world()
+    game.seed_game(seed)
+    game.GRID_LENGTH = max(600, int(math.sqrt(size) * WORLD_SPACING))
+    game.max_pokemon = sys.maxsize  # Let spawn_pokemon keep adding
+
+    half = game.GRID_LENGTH - 50
+    game.world_chunks.active.update(game.world_chunks.keys_in(-half, -half, half, half))  # All live, no streaming
+    placed = game.spawn_many(size, -half, -half, half, half, min_distance=WORLD_SPACING)
+    if placed < size:
+        raise SystemExit(f"Only {placed} of {size} pokemon fit at spacing {WORLD_SPACING}")
+    game.bush_visibility.update(game.player_pos[0], game.player_pos[1], game.player_radius)
+
+def fill_projectiles(count):
+    """Put count projectiles of each kind in flight over random pokemon, at full player health"""
+    game.player_health = game.player_max_health
+    rng = game.game_rng
+    store = game.pokemon_store
+    for pool in (game.pokeballs_thrown, game.rocks_thrown, game.opponent_pokeballs_thrown):
+        pool.clear()
+        targets = rng.integers(store.count, size=count) if store.count else np.zeros(count, dtype=int)
+        for j in targets.tolist():
+            x = float(store.x[j]) + rng.uniform(-60, 60)
+            y = float(store.y[j]) + rng.uniform(-60, 60)
+            vx, vy = rng.uniform(-300, 300, 2).tolist()
+            game.launch_projectile(pool, x, y, 40.0, vx, vy, rng.uniform(-50, 150))
+
+def time_samples(function, reset, size, seed, projectiles, samples, calls):
+    """Per-call seconds for each sample of calls back-to-back calls, each from the same start state"""
+    results = []
+    for _ in range(samples):
+        if reset == WORLD:
+            seed_world(size, seed)
+        if reset != NO_RESET:
+            fill_projectiles(projectiles)
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter() - start
+        game.event_log.flush()  # Keep one sample's log writes out of the next
+        results.append(elapsed / calls)
+    return results
+
+def summarize(name, size, per_call):
+    """One result record: per-call times and ops/sec with their spread"""
+    ops = [1.0 / seconds for seconds in per_call]
+    mean = statistics.mean(per_call)
+    return {
+        "function": name,
+        "size": size,
+        "samples": len(per_call),
+        "mean_ms": mean * 1e3,
+        "stdev_ms": statistics.stdev(per_call) * 1e3 if len(per_call) > 1 else 0.0,
+        "min_ms": min(per_call) * 1e3,
+        "ops_per_sec": 1.0 / mean,
+        "ops_per_sec_stdev": statistics.stdev(ops) if len(ops) > 1 else 0.0,
+    }
+
+def run(sizes, samples, calls, projectiles, seed):
+    """Benchmark every function at every size and return the JSON-ready report"""
+    results = []
+    grid_length, max_pokemon = game.GRID_LENGTH, game.max_pokemon  # seed_world() overrides both
+    try:
+        for size in sizes:
+            seed_world(size, seed)
+            for name, function, reset in BENCHMARKS:
+                time_samples(function, reset, size, seed, projectiles, 1, 1)  # Warm-up
+                per_call = time_samples(function, reset, size, seed, projectiles, samples, calls)
+                record = summarize(name, size, per_call)
+                results.append(record)
+                print(f"{name:>26} n={size:<7} {record['ops_per_sec']:>12.1f} ops/s "
+                      f"± {record['ops_per_sec_stdev']:.1f}  ({record['mean_ms']:.3f} ms)", file=sys.stderr)
+    finally:
+        game.GRID_LENGTH, game.max_pokemon = grid_length, max_pokemon
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": seed,
+            "samples": samples,
+            "calls_per_sample": calls,
+            "projectiles_per_pool": projectiles,
+        },
+        "results": results,
+    }
+
+def compare(report, baseline, max_regression):
+    """Print speed relative to a baseline report; return the regressed entries"""
+    previous = {(r["function"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for record in report["results"]:
+        key = (record["function"], record["size"])
+        if key not in previous:
+            continue
+        ratio = record["ops_per_sec"] / previous[key]["ops_per_sec"]
+        flag = ""
+        if ratio < 1.0 - max_regression:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key[0]:>26} n={key[1]:<7} {ratio:6.2f}x baseline{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game's update functions")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="pokemon/bush counts to seed")
+    parser.add_argument("--samples", type=int, default=10, help="timed samples per function and size")
+    parser.add_argument("--calls", type=int, default=5, help="calls timed back to back in each sample")
+    parser.add_argument("--projectiles", type=int, default=game.PROJECTILE_POOL_SIZE, help="in-flight projectiles of each kind")
+    parser.add_argument("--seed", type=int, default=1, help="world seed")
+    parser.add_argument("--ai-workers", type=int, default=0, help="time update_pokemon with this many AI worker processes")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed slowdown vs the baseline before failing")
+    args = parser.parse_args()
+
+    game.event_log.open(os.devnull)  # Game events are queued as in play, then discarded
+    game.pokemon_ai = game.start_pokemon_ai(args.ai_workers)
+    try:
+        report = run(args.sizes, args.samples, args.calls, min(args.projectiles, game.PROJECTILE_POOL_SIZE), args.seed)
+    finally:
+        if game.pokemon_ai is not None:
+            game.pokemon_ai.close()
+    report["meta"]["ai_workers"] = args.ai_workers if game.pokemon_ai is not None else 0
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    elif not args.baseline:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(report, json.load(file), args.max_regression)
+        if regressions:
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()